@@ -2,79 +2,117 @@
 """
 AI Cooking Assistant using Perplexity API (with OpenAI fallback).
 Provides help with cooking steps, ingredient substitutions, and tips.
+LLM calls use async clients on the shared ai_runtime event loop; step
+explanations and ingredient tips are served from ai_cache when possible.
 """
 
+import json
 import os
+import threading
 from dotenv import load_dotenv
+import ai_cache
+import ai_router
+import ai_runtime
+import image_pipeline
+import semantic_cache
+import single_flight
+from knowledge import knowledge_base
 
 load_dotenv()
 
 
-def get_perplexity_client():
+# Connection pool and timeouts shared by every cached client
+AI_CONNECT_TIMEOUT = float(os.getenv('AI_CONNECT_TIMEOUT', 5))
+AI_READ_TIMEOUT = float(os.getenv('AI_READ_TIMEOUT', 60))
+AI_MAX_CONNECTIONS = int(os.getenv('AI_MAX_CONNECTIONS', 20))
+AI_MAX_KEEPALIVE = int(os.getenv('AI_MAX_KEEPALIVE', 10))
+AI_KEEPALIVE_EXPIRY = float(os.getenv('AI_KEEPALIVE_EXPIRY', 60))
+AI_MAX_RETRIES = int(os.getenv('AI_MAX_RETRIES', 1))
+
+PERPLEXITY_BASE_URL = "https://api.perplexity.ai"
+
+_clients = {}
+_clients_pid = None
+_clients_lock = threading.Lock()
+
+
+def _get_cached_client(api_key, base_url=None):
+    """
+    Get a long-lived async client for one provider, creating it on first use.
+    Clients keep their HTTP connection pool (and TLS sessions) alive between
+    calls; they are recreated after a fork because pools cannot be shared.
     """
-    Get Perplexity client.
+    global _clients_pid
+    key = (api_key, base_url)
+    
+    with _clients_lock:
+        if _clients_pid != os.getpid():
+            _clients.clear()
+            _clients_pid = os.getpid()
+        
+        client = _clients.get(key)
+        if client is None:
+            import httpx
+            from openai import AsyncOpenAI
+            
+            limits = httpx.Limits(
+                max_connections=AI_MAX_CONNECTIONS,
+                max_keepalive_connections=AI_MAX_KEEPALIVE,
+                keepalive_expiry=AI_KEEPALIVE_EXPIRY,
+            )
+            timeout = httpx.Timeout(AI_READ_TIMEOUT, connect=AI_CONNECT_TIMEOUT)
+            
+            options = {'base_url': base_url} if base_url else {}
+            client = AsyncOpenAI(
+                api_key=api_key,
+                http_client=httpx.AsyncClient(limits=limits, timeout=timeout),
+                timeout=timeout,
+                max_retries=AI_MAX_RETRIES,
+                **options
+            )
+            _clients[key] = client
+        return client
+
+
+def _api_key(name, placeholder):
+    """An API key from the environment, or None if unset or left at the .env.example placeholder."""
+    api_key = os.getenv(name)
+    if not api_key or api_key.startswith(placeholder):
+        return None
+    return api_key
+
+
+def get_async_perplexity_client():
+    """
+    Get an async Perplexity client for use on the AI event loop.
     Note: Perplexity API is compatible with OpenAI SDK, so we use the 'openai' library.
     This does NOT require an OpenAI account, just the library.
     """
-    api_key = os.getenv('PERPLEXITY_API_KEY')
-    if not api_key or api_key.startswith('pplx-your'):
+    api_key = _api_key('PERPLEXITY_API_KEY', 'pplx-your')
+    if not api_key:
         return None
     
     try:
-        from openai import OpenAI
-        return OpenAI(
-            api_key=api_key,
-            base_url="https://api.perplexity.ai"
-        )
+        return _get_cached_client(api_key, PERPLEXITY_BASE_URL)
     except ImportError:
         print("❌ 错误: 未安装 'openai' 库。请运行: pip install openai")
         return None
 
 
-def get_openai_client():
-    """Get OpenAI client (for vision tasks)."""
-    api_key = os.getenv('OPENAI_API_KEY')
-    if not api_key or api_key.startswith('sk-your'):
+def get_async_openai_client():
+    """Get an async OpenAI client for use on the AI event loop (also used for vision)."""
+    api_key = _api_key('OPENAI_API_KEY', 'sk-your')
+    if not api_key:
         return None
     
     try:
-        from openai import OpenAI
-        return OpenAI(api_key=api_key)
+        return _get_cached_client(api_key)
     except ImportError:
         return None
 
 
-def get_ai_client():
-    """Get the best available AI client (Perplexity first, then OpenAI)."""
-    client = get_perplexity_client()
-    if client:
-        return client, "perplexity"
-    
-    client = get_openai_client()
-    if client:
-        return client, "openai"
-    
-    return None, None
-
-
-def get_cooking_help(recipe_name, recipe_steps, user_question, ingredients=None):
-    """
-    Get AI assistance for cooking.
-    
-    Args:
-        recipe_name: Name of the dish
-        recipe_steps: List of cooking steps
-        user_question: User's question
-        ingredients: Optional list of ingredients
-    
-    Returns:
-        AI response string
-    """
-    client, provider = get_ai_client()
-    
-    if not client:
-        return get_fallback_response(user_question)
-    
+def build_cooking_help_messages(recipe_name, recipe_steps, user_question, ingredients=None):
+    """Chat messages for a cooking-help question."""
     steps_text = "\n".join([f"{i+1}. {step}" for i, step in enumerate(recipe_steps)])
     ingredients_text = ", ".join(ingredients) if ingredients else "未提供"
     
@@ -100,94 +138,160 @@ def get_cooking_help(recipe_name, recipe_steps, user_question, ingredients=None)
 
 请针对用户的问题提供帮助。"""
 
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt}
+    ]
+
+
+def get_cooking_help(recipe_name, recipe_steps, user_question, ingredients=None):
+    """
+    Get AI assistance for cooking.
+    
+    Args:
+        recipe_name: Name of the dish
+        recipe_steps: List of cooking steps
+        user_question: User's question
+        ingredients: Optional list of ingredients
+    
+    Returns:
+        AI response string
+    """
+    # Generic questions are answered from the local knowledge base; with a
+    # recipe in context only by answers that do not depend on the dish
+    local = knowledge_base.first_tier_answer(user_question, has_recipe=bool(recipe_name or recipe_steps))
+    if local:
+        return local
+    
+    # A similar question about this recipe may already have been answered
+    cached = semantic_cache.lookup(recipe_name, user_question)
+    if cached:
+        return cached
+    
+    route = ai_router.candidates()
+    
+    if not route:
+        return get_fallback_response(user_question)
+    
     try:
-        # Choose model based on provider
-        if provider == "perplexity":
-            model = "sonar-pro"
-        else:
-            model = "gpt-4o-mini"
-        
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
+        answer = ai_router.complete(
+            build_cooking_help_messages(recipe_name, recipe_steps, user_question, ingredients),
+            route=route,
             max_tokens=500,
             temperature=0.7
         )
-        
-        return response.choices[0].message.content
+        semantic_cache.store(recipe_name, user_question, answer)
+        return answer
         
     except Exception as e:
-        print(f"AI API error ({provider}): {e}")
+        print(f"AI API error: {e}")
         return get_fallback_response(user_question)
 
 
-def get_fallback_response(question):
-    """Provide fallback responses when AI is unavailable."""
-    question_lower = question.lower()
+def stream_cooking_help(recipe_name, recipe_steps, user_question, ingredients=None):
+    """
+    Streaming variant of get_cooking_help: yields the answer in text chunks
+    as the model produces them. A provider failing before the first chunk
+    hands over to the next one; the canned answer is used when none is
+    available or all fail. A failure after the first chunk is raised so the
+    caller can end the stream.
+    """
+    local = knowledge_base.first_tier_answer(user_question, has_recipe=bool(recipe_name or recipe_steps))
+    if local:
+        yield local
+        return
     
-    responses = {
-        "火候": "🔥 一般来说:\n• 大火用于快速炒制和煮沸\n• 中火用于煎蛋和普通烹饪\n• 小火用于熬粥和慢炖\n\n如果不确定，从中火开始，根据情况调整。",
-        
-        "多久": "⏱️ 烹饪时间因食材和火力而异:\n• 煮蛋: 7-10分钟\n• 蒸蛋: 8-10分钟\n• 蒸玉米: 15-20分钟\n• 煮粥: 20-30分钟\n\n观察食物状态是最好的判断方式！",
-        
-        "替代": "🔄 常见替代:\n• 没有橄榄油 → 用植物油\n• 没有牛油果 → 用香蕉或鸡蛋\n• 没有燕麦 → 用小米或大米\n• 没有酸奶 → 用牛奶\n\n创意烹饪，灵活变通！",
-        
-        "熟": "✅ 判断熟度:\n• 鸡蛋: 蛋白凝固，蛋黄看个人喜好\n• 鸡肉: 切开无粉红色，肉汁清澈\n• 玉米: 颜色变深，有香气\n• 红薯: 筷子能轻松插入\n\n安全第一！",
-        
-        "失败": "💪 别灰心！烹饪是练习的过程:\n• 糊了 → 下次火小一点\n• 太淡 → 加点盐调味\n• 太咸 → 加点水或配着淡的食物吃\n\n每次失败都是进步的机会！",
-    }
+    cached = semantic_cache.lookup(recipe_name, user_question)
+    if cached:
+        yield cached
+        return
     
-    for keyword, response in responses.items():
-        if keyword in question_lower:
-            return response
+    route = ai_router.candidates()
+    messages = build_cooking_help_messages(recipe_name, recipe_steps, user_question, ingredients)
     
-    return """🤔 这是个好问题！
+    # Streams are not hedged, but go through the same circuit-breaker
+    # bookkeeping as routed calls (one trial at a time when half-open).
+    # A provider that fails before the first chunk hands over to the next.
+    for client, provider, model in route:
+        ticket = ai_router.begin(provider)
+        if ticket is None:
+            continue  # Another request holds this provider's trial call
+        sent = False
+        recorded = False
+        try:
+            ai_runtime.run(ai_router.throttle(provider))
+            stream = ai_runtime.run(client.chat.completions.create(
+                model=model,
+                messages=messages,
+                max_tokens=500,
+                temperature=0.7,
+                stream=True
+            ))
+            # Time to the first chunk is not an answer's latency: keep it
+            # out of the window hedge_delay() takes its p95 from
+            ai_router.record(provider, None, True, ticket)
+            recorded = True
+            
+            parts = []
+            for chunk in ai_runtime.iterate(stream):
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    sent = True
+                    parts.append(text)
+                    yield text
+            
+            semantic_cache.store(recipe_name, user_question, ''.join(parts))
+            return
+            
+        except Exception as e:
+            if not recorded:
+                ai_router.record(provider, None, False, ticket)
+                recorded = True
+            print(f"AI API error ({provider}): {e}")
+            if sent:
+                raise
+        finally:
+            # Closed before the provider answered (client went away): no outcome to record
+            if not recorded:
+                ai_router.abandon(provider, ticket)
     
-一些通用建议:
-1. 仔细阅读步骤，不着急
-2. 提前准备好所有食材
-3. 从简单的菜开始练习
-4. 多尝试，不怕失败
+    yield get_fallback_response(user_question)
 
-如果有具体问题，欢迎继续问我！😊
 
-提示: 配置 Perplexity 或 OpenAI API key 可以获得更智能的回答哦！"""
+def get_fallback_response(question):
+    """Provide fallback responses when AI is unavailable."""
+    return knowledge_base.answer(question)
 
 
 def get_step_explanation(recipe_name, step_number, step_text):
     """Get detailed explanation for a specific cooking step."""
-    client, provider = get_ai_client()
+    route = ai_router.candidates()
     
-    if not client:
+    if not route:
         return f"📝 步骤 {step_number}: {step_text}\n\n💡 提示: 按照步骤操作，注意火候和时间。如需更详细帮助，请配置 API。"
     
     try:
-        # Choose model based on provider
-        if provider == "perplexity":
-            model = "sonar-pro"
-        else:
-            model = "gpt-4o-mini"
+        messages = [
+            {
+                "role": "system", 
+                "content": "你是一位耐心的烹饪导师。请用简单易懂的语言详细解释烹饪步骤，包括具体操作、注意事项和常见错误。使用emoji让解释更生动。"
+            },
+            {
+                "role": "user", 
+                "content": f"请详细解释这个烹饪步骤:\n\n菜品: {recipe_name}\n步骤 {step_number}: {step_text}\n\n请包括: 具体怎么操作、要注意什么、常见问题及解决方法。"
+            }
+        ]
         
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "你是一位耐心的烹饪导师。请用简单易懂的语言详细解释烹饪步骤，包括具体操作、注意事项和常见错误。使用emoji让解释更生动。"
-                },
-                {
-                    "role": "user", 
-                    "content": f"请详细解释这个烹饪步骤:\n\n菜品: {recipe_name}\n步骤 {step_number}: {step_text}\n\n请包括: 具体怎么操作、要注意什么、常见问题及解决方法。"
-                }
-            ],
-            max_tokens=400,
-            temperature=0.7
-        )
+        def compute():
+            return ai_router.complete(messages, route=route, max_tokens=400, temperature=0.7)
         
-        return response.choices[0].message.content
+        # Keyed on the preferred provider, whichever one ends up answering
+        _, provider, model = route[0]
+        return ai_cache.cached_completion(
+            'step', provider, model, messages, compute, max_tokens=400, temperature=0.7
+        )
         
     except Exception as e:
         return f"📝 步骤 {step_number}: {step_text}\n\n抱歉，暂时无法获取详细解释。请按照步骤操作即可。"
@@ -195,66 +299,57 @@ def get_step_explanation(recipe_name, step_number, step_text):
 
 def get_ingredient_tips(ingredient_name):
     """Get tips for selecting and preparing an ingredient."""
-    client, provider = get_ai_client()
+    tips = knowledge_base.ingredient_tips(ingredient_name)
+    if tips:
+        return tips
     
-    tips = {
-        "鸡蛋": "🥚 鸡蛋选购技巧:\n• 新鲜鸡蛋放水中会沉底\n• 壳面粗糙的更新鲜\n• 冷藏保存，大头朝上",
-        "红薯": "🍠 红薯选购技巧:\n• 选择表皮光滑无斑点的\n• 中等大小的口感更好\n• 存放在阴凉通风处",
-        "玉米": "🌽 玉米选购技巧:\n• 选择颗粒饱满的\n• 按压有弹性的更新鲜\n• 叶子青绿的更嫩",
-    }
+    route = ai_router.candidates()
     
-    if ingredient_name in tips:
-        return tips[ingredient_name]
-    
-    if not client:
+    if not route:
         return f"💡 {ingredient_name}: 选择新鲜的，储存在适当条件下。"
     
     try:
-        # Choose model based on provider
-        if provider == "perplexity":
-            model = "sonar-pro"
-        else:
-            model = "gpt-4o-mini"
+        messages = [
+            {
+                "role": "system", 
+                "content": "你是食材专家。简洁地提供食材的选购和保存技巧，使用emoji。"
+            },
+            {
+                "role": "user", 
+                "content": f"请提供 {ingredient_name} 的选购和保存技巧（50字以内）"
+            }
+        ]
         
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {
-                    "role": "system", 
-                    "content": "你是食材专家。简洁地提供食材的选购和保存技巧，使用emoji。"
-                },
-                {
-                    "role": "user", 
-                    "content": f"请提供 {ingredient_name} 的选购和保存技巧（50字以内）"
-                }
-            ],
-            max_tokens=150,
-            temperature=0.7
-        )
+        def compute():
+            return ai_router.complete(messages, route=route, max_tokens=150, temperature=0.7)
         
-        return response.choices[0].message.content
+        # Keyed on the preferred provider, whichever one ends up answering
+        _, provider, model = route[0]
+        return ai_cache.cached_completion(
+            'ingredient', provider, model, messages, compute, max_tokens=150, temperature=0.7
+        )
         
     except Exception as e:
         return f"💡 {ingredient_name}: 选择新鲜的食材，注意保存条件。"
 
 
-def extract_recipe_from_image(image_base64):
+def extract_recipe_from_image(image_base64, mime_type="image/jpeg"):
     """
     Extract recipe information from an image using OpenAI Vision.
     
     Args:
         image_base64: Base64 encoded image data
+        mime_type: MIME type of the image
     
     Returns:
         Dictionary with recipe data or error message
     """
     # Vision requires OpenAI - Perplexity doesn't support image analysis
-    client = get_openai_client()
+    client = get_async_openai_client()
     
     if not client:
         # Perplexity does not support vision/image analysis
-        perplexity_client = get_perplexity_client()
-        if perplexity_client:
+        if _api_key('PERPLEXITY_API_KEY', 'pplx-your'):
             return {
                 "success": False,
                 "error": "图片识别需要 OpenAI API。\n\n💡 但您可以描述菜品名称，我会帮您生成食谱！\n\n请在对话框中输入菜品名称，例如：'帮我生成番茄炒蛋的食谱'"
@@ -265,7 +360,7 @@ def extract_recipe_from_image(image_base64):
         }
     
     try:
-        response = client.chat.completions.create(
+        response = ai_runtime.run(client.chat.completions.create(
             model="gpt-4o",
             messages=[
                 {
@@ -307,14 +402,14 @@ def extract_recipe_from_image(image_base64):
                         {
                             "type": "image_url",
                             "image_url": {
-                                "url": f"data:image/jpeg;base64,{image_base64}"
+                                "url": f"data:{mime_type};base64,{image_base64}"
                             }
                         }
                     ]
                 }
             ],
             max_tokens=1500
-        )
+        ))
         
         result_text = response.choices[0].message.content
         
@@ -323,7 +418,6 @@ def extract_recipe_from_image(image_base64):
             lines = result_text.split("\n")
             result_text = "\n".join(lines[1:-1])
         
-        import json
         recipe_data = json.loads(result_text)
         
         if "error" in recipe_data:
@@ -344,6 +438,97 @@ def extract_recipe_from_image(image_base64):
         }
 
 
+def extract_recipe_from_upload(image_bytes):
+    """
+    Extract recipe information from uploaded image bytes.
+    The image is downscaled before it is sent to the model, and the result
+    for a file with the same content hash is reused (marked "cached").
+    
+    Args:
+        image_bytes: Raw bytes of the uploaded image
+    
+    Returns:
+        Dictionary with recipe data or error message
+    """
+    import base64
+    
+    key = f"vision:{image_pipeline.content_hash(image_bytes)}"
+    cached = ai_cache.get(key, "vision")
+    if cached:
+        recipe_data = json.loads(cached)
+        recipe_data["cached"] = True
+        return recipe_data
+    
+    def extract():
+        try:
+            image, mime_type = image_pipeline.prepare_image(image_bytes)
+        except ValueError as e:
+            return {"success": False, "error": f"无法读取图片: {str(e)}"}
+        
+        recipe_data = extract_recipe_from_image(base64.b64encode(image).decode("ascii"), mime_type)
+        if recipe_data.get("success"):
+            ai_cache.put(key, "vision", json.dumps(recipe_data, ensure_ascii=False))
+        return recipe_data
+    
+    # Identical photos uploaded at the same time share one model call
+    return single_flight.do(key, extract)
+
+
+def _insert_recipe_rows(cursor, recipe_data):
+    """Write one recipe and its ingredients, steps and nutrition; returns the recipe id."""
+    # Insert recipe
+    cursor.execute('''
+        INSERT INTO recipes (recipe_name, recipe_name_en, category, difficulty, 
+            cooking_time, user_rating)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (
+        recipe_data.get('recipe_name', '未命名'),
+        recipe_data.get('recipe_name_en', ''),
+        recipe_data.get('category', '其他'),
+        recipe_data.get('difficulty', 1),
+        recipe_data.get('cooking_time', 10),
+        3.0
+    ))
+    recipe_id = cursor.lastrowid
+    
+    # Insert ingredients
+    cursor.executemany('''
+        INSERT INTO ingredients (recipe_id, ingredient_name, quantity, unit, notes)
+        VALUES (?, ?, ?, ?, ?)
+    ''', [(
+        recipe_id,
+        ing.get('name', ''),
+        ing.get('quantity', 0),
+        ing.get('unit', ''),
+        ing.get('notes', '')
+    ) for ing in recipe_data.get('ingredients', [])])
+    
+    # Insert instructions
+    cursor.executemany('''
+        INSERT INTO instructions (recipe_id, step_number, instruction)
+        VALUES (?, ?, ?)
+    ''', [(
+        recipe_id,
+        inst.get('step', 1),
+        inst.get('description', '')
+    ) for inst in recipe_data.get('instructions', [])])
+    
+    # Insert nutrition
+    nutr = recipe_data.get('nutrition', {})
+    cursor.execute('''
+        INSERT INTO nutrition (recipe_id, calories, protein, carbohydrate, fat, fiber)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''', (
+        recipe_id,
+        nutr.get('calories', 0),
+        nutr.get('protein', 0),
+        nutr.get('carbohydrate', 0),
+        nutr.get('fat', 0),
+        nutr.get('fiber', 0)
+    ))
+    return recipe_id
+
+
 def insert_recipe_to_db(recipe_data):
     """
     Insert extracted recipe data into the database.
@@ -354,69 +539,13 @@ def insert_recipe_to_db(recipe_data):
     Returns:
         Dictionary with success status and recipe id
     """
-    import sqlite3
+    import db
     
-    db_path = os.path.join(os.path.dirname(__file__), 'breakfast.db')
+    conn = db.get_connection()
     
     try:
-        conn = sqlite3.connect(db_path)
-        cursor = conn.cursor()
-        
-        # Insert recipe
-        cursor.execute('''
-            INSERT INTO recipes (recipe_name, recipe_name_en, category, difficulty, 
-                cooking_time, user_rating)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            recipe_data.get('recipe_name', '未命名'),
-            recipe_data.get('recipe_name_en', ''),
-            recipe_data.get('category', '其他'),
-            recipe_data.get('difficulty', 1),
-            recipe_data.get('cooking_time', 10),
-            3.0
-        ))
-        recipe_id = cursor.lastrowid
-        
-        # Insert ingredients
-        for ing in recipe_data.get('ingredients', []):
-            cursor.execute('''
-                INSERT INTO ingredients (recipe_id, ingredient_name, quantity, unit, notes)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (
-                recipe_id,
-                ing.get('name', ''),
-                ing.get('quantity', 0),
-                ing.get('unit', ''),
-                ing.get('notes', '')
-            ))
-        
-        # Insert instructions
-        for inst in recipe_data.get('instructions', []):
-            cursor.execute('''
-                INSERT INTO instructions (recipe_id, step_number, instruction)
-                VALUES (?, ?, ?)
-            ''', (
-                recipe_id,
-                inst.get('step', 1),
-                inst.get('description', '')
-            ))
-        
-        # Insert nutrition
-        nutr = recipe_data.get('nutrition', {})
-        cursor.execute('''
-            INSERT INTO nutrition (recipe_id, calories, protein, carbohydrate, fat, fiber)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            recipe_id,
-            nutr.get('calories', 0),
-            nutr.get('protein', 0),
-            nutr.get('carbohydrate', 0),
-            nutr.get('fat', 0),
-            nutr.get('fiber', 0)
-        ))
-        
+        recipe_id = _insert_recipe_rows(conn.cursor(), recipe_data)
         conn.commit()
-        conn.close()
         
         return {
             "success": True,
@@ -425,12 +554,60 @@ def insert_recipe_to_db(recipe_data):
         }
         
     except Exception as e:
+        conn.rollback()
         return {
             "success": False,
             "error": f"数据库插入失败: {str(e)}"
         }
 
 
+def insert_recipes_to_db(recipes):
+    """
+    Insert many recipes in one transaction. Each recipe is written under its
+    own savepoint, so a malformed one is skipped without losing the rest.
+    
+    Args:
+        recipes: List of recipe dictionaries
+    
+    Returns:
+        One result per recipe, as returned by insert_recipe_to_db
+    """
+    import db
+    
+    if not recipes:
+        return []
+    
+    conn = db.get_connection()
+    results = []
+    
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        cursor = conn.cursor()
+        for recipe_data in recipes:
+            cursor.execute('SAVEPOINT recipe')
+            try:
+                recipe_id = _insert_recipe_rows(cursor, recipe_data)
+                cursor.execute('RELEASE recipe')
+                results.append({
+                    "success": True,
+                    "recipe_id": recipe_id,
+                    "message": f"✅ 成功添加食谱: {recipe_data.get('recipe_name', '未命名')}"
+                })
+            except Exception as e:
+                cursor.execute('ROLLBACK TO recipe')
+                cursor.execute('RELEASE recipe')
+                results.append({
+                    "success": False,
+                    "error": f"数据库插入失败: {str(e)}"
+                })
+        conn.commit()
+        return results
+        
+    except Exception as e:
+        conn.rollback()
+        return [{"success": False, "error": f"数据库插入失败: {str(e)}"} for _ in recipes]
+
+
 def generate_recipe_from_name(dish_name):
     """
     Generate a complete recipe from just a dish name using AI.
@@ -442,9 +619,11 @@ def generate_recipe_from_name(dish_name):
     Returns:
         Dictionary with recipe data or error message
     """
-    client, provider = get_ai_client()
+    route = ai_router.candidates()
     
-    if not client:
+    if not route:
+        if ai_router.is_configured():
+            return {"success": False, "error": "AI 服务暂时不可用，请稍后再试。"}
         return {
             "success": False,
             "error": "AI API 未配置。请在 .env 文件中设置 PERPLEXITY_API_KEY 或 OPENAI_API_KEY。"
@@ -476,23 +655,18 @@ def generate_recipe_from_name(dish_name):
 请生成适合早餐的健康食谱。只返回JSON，不要其他文字。"""
 
     try:
-        # Choose model based on provider
-        if provider == "perplexity":
-            model = "sonar-pro"
-        else:
-            model = "gpt-4o-mini"
+        messages = [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f'请为"{dish_name}"生成完整的早餐食谱，包括食材、步骤和营养信息。'}
+        ]
         
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f'请为"{dish_name}"生成完整的早餐食谱，包括食材、步骤和营养信息。'}
-            ],
-            max_tokens=1500,
-            temperature=0.7
-        )
+        def fetch():
+            return ai_router.complete(messages, route=route, max_tokens=1500, temperature=0.7)
         
-        result_text = response.choices[0].message.content
+        # Identical concurrent requests share one LLM call
+        _, provider, model = route[0]
+        key = ai_cache.make_key(provider, model, messages, max_tokens=1500, temperature=0.7)
+        result_text = single_flight.do(f'generate:{key}', fetch)
         
         # Clean up the response - remove markdown code blocks if present
         if "```" in result_text:
@@ -502,7 +676,6 @@ def generate_recipe_from_name(dish_name):
                 result_text = json_match.group(1)
         
         try:
-            import json
             recipe_data = json.loads(result_text.strip())
             recipe_data["success"] = True
             return recipe_data
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Persistent cache for AI responses.
+Answers are stored in SQLite, so every worker shares them and they survive
+restarts. Entries expire after a TTL, and once the cache is full the least
+recently used entries are evicted. Keys are a hash of the provider, model,
+prompt and inputs after normalization, so trivially different requests
+(extra whitespace, full-width characters) share one entry.
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+
+import db
+import single_flight
+from counters import CounterBuffer
+
+# Seconds an AI answer stays valid
+AI_CACHE_TTL_SECONDS = float(os.getenv('AI_CACHE_TTL_SECONDS', 30 * 24 * 3600))
+# Most entries kept; the least recently used are evicted beyond this
+AI_CACHE_MAX_ENTRIES = int(os.getenv('AI_CACHE_MAX_ENTRIES', 5000))
+# Minimum seconds between last-used updates of one entry (saves a write per hit)
+AI_CACHE_TOUCH_SECONDS = float(os.getenv('AI_CACHE_TOUCH_SECONDS', 300))
+# Bump to invalidate every entry after a prompt change that keys don't capture
+AI_CACHE_VERSION = 1
+
+_WHITESPACE = re.compile(r'\s+')
+
+# Hit/miss counters per kind, written behind like times_drawn
+stats_buffer = CounterBuffer(
+    '''INSERT INTO ai_cache_stats (name, value) VALUES (?2, ?1)
+       ON CONFLICT(name) DO UPDATE SET value = value + excluded.value''',
+    flush_seconds=30,
+    max_pending=100,
+)
+
+atexit.register(stats_buffer.flush)
+
+
+def normalize(value):
+    """Normalize text (Unicode form, whitespace, case) inside any JSON-like value."""
+    if isinstance(value, str):
+        return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', value)).strip().lower()
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    return value
+
+
+def make_key(provider, model, messages, **params):
+    """Cache key for one LLM request."""
+    payload = [AI_CACHE_VERSION, provider, model, normalize(messages), sorted(params.items())]
+    raw = json.dumps(payload, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def get(key, kind):
+    """Cached value for key, or None when missing or expired."""
+    conn = db.get_connection()
+    now = time.time()
+    row = conn.execute(
+        'SELECT value, last_used FROM ai_cache WHERE key = ? AND expires_at > ?',
+        (key, now)
+    ).fetchone()
+
+    if row is None:
+        stats_buffer.add(f'{kind}:miss')
+        return None
+
+    stats_buffer.add(f'{kind}:hit')
+    if now - row['last_used'] > AI_CACHE_TOUCH_SECONDS:
+        try:
+            conn.execute('UPDATE ai_cache SET last_used = ? WHERE key = ?', (now, key))
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"⚠️ Failed to touch AI cache entry: {e}")
+    return row['value']
+
+
+def put(key, kind, value, ttl=None):
+    """Store a value, evicting expired and least recently used entries."""
+    conn = db.get_connection()
+    now = time.time()
+    try:
+        conn.execute('''
+            INSERT OR REPLACE INTO ai_cache (key, kind, value, created_at, expires_at, last_used)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', (key, kind, value, now, now + (ttl or AI_CACHE_TTL_SECONDS), now))
+        conn.execute('DELETE FROM ai_cache WHERE expires_at <= ?', (now,))
+        conn.execute('''
+            DELETE FROM ai_cache WHERE key IN (
+                SELECT key FROM ai_cache ORDER BY last_used
+                LIMIT max(0, (SELECT COUNT(*) FROM ai_cache) - ?)
+            )
+        ''', (AI_CACHE_MAX_ENTRIES,))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"⚠️ Failed to store AI cache entry: {e}")
+
+
+def cached_completion(kind, provider, model, messages, compute, **params):
+    """
+    Return the cached answer for an LLM request, calling compute() on a miss.
+    Concurrent misses for the same key share one compute() call. Only
+    answers compute() returns are stored; exceptions propagate uncached.
+    """
+    key = make_key(provider, model, messages, **params)
+    value = get(key, kind)
+    if value is None:
+        def fill():
+            result = compute()
+            if result:
+                put(key, kind, result)
+            return result
+        value = single_flight.do(key, fill)
+    return value
+
+
+def get_stats():
+    """Entry count and hit/miss counters per kind, across all workers."""
+    stats_buffer.flush()
+    conn = db.get_connection()
+
+    kinds = {}
+    for name, value in conn.execute('SELECT name, value FROM ai_cache_stats'):
+        kind, _, outcome = name.rpartition(':')
+        counts = kinds.setdefault(kind, {'hits': 0, 'misses': 0})
+        counts['hits' if outcome == 'hit' else 'misses'] += value
+
+    for counts in kinds.values():
+        total = counts['hits'] + counts['misses']
+        counts['hit_rate'] = round(counts['hits'] / total, 3) if total else 0.0
+
+    entries = conn.execute(
+        'SELECT COUNT(*) FROM ai_cache WHERE expires_at > ?', (time.time(),)
+    ).fetchone()[0]
+    return {'entries': entries, 'max_entries': AI_CACHE_MAX_ENTRIES, 'kinds': kinds}
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Health-aware routing between LLM providers.
+Each worker keeps a rolling window of latency and outcome per provider.
+Repeated failures open a circuit that takes the provider out of rotation
+for a cool-down; a request to a slow primary is hedged by firing the
+secondary once the primary exceeds its usual (p95) latency, and whichever
+answers first wins. Optional per-provider rate limits pace calls so bulk
+work stays under a provider's requests-per-minute quota.
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+import ai_runtime
+
+# Provider preference order and the chat model used for each
+PROVIDER_MODELS = {
+    'perplexity': 'sonar-pro',
+    'openai': 'gpt-4o-mini',
+}
+
+# Calls per provider kept for latency and error-rate statistics
+AI_HEALTH_WINDOW = int(os.getenv('AI_HEALTH_WINDOW', 50))
+# Consecutive failures that open a provider's circuit
+AI_CIRCUIT_FAILURES = int(os.getenv('AI_CIRCUIT_FAILURES', 3))
+# Seconds an open circuit waits before letting a trial call through
+AI_CIRCUIT_COOLDOWN = float(os.getenv('AI_CIRCUIT_COOLDOWN', 30))
+# Error rate over the window above which a provider is tried last
+AI_DEMOTE_ERROR_RATE = float(os.getenv('AI_DEMOTE_ERROR_RATE', 0.5))
+# Hedge delay bounds (seconds); used until enough latencies are known
+AI_HEDGE_MIN_DELAY = float(os.getenv('AI_HEDGE_MIN_DELAY', 2))
+AI_HEDGE_MAX_DELAY = float(os.getenv('AI_HEDGE_MAX_DELAY', 15))
+# Calls per minute allowed per provider and worker, e.g. "perplexity=50,openai=500"
+# (providers left out are not limited)
+AI_RATE_LIMITS = {
+    name.strip(): float(limit)
+    for name, _, limit in (item.partition('=') for item in os.getenv('AI_RATE_LIMITS', '').split(','))
+    if name.strip() and limit.strip()
+}
+
+
+class ProviderHealth:
+    """Rolling statistics and circuit-breaker state for one provider."""
+
+    def __init__(self, window):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.consecutive_failures = 0
+        self.opened_at = None
+        self.trial_running = False
+
+    def record(self, latency, ok, ticket):
+        self.outcomes.append(ok)
+        if ok:
+            if latency is not None:
+                self.latencies.append(latency)
+            self.consecutive_failures = 0
+            self.opened_at = None
+        else:
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= AI_CIRCUIT_FAILURES:
+                self.opened_at = time.monotonic()
+        if ticket == 'trial':
+            self.trial_running = False
+
+    @property
+    def error_rate(self):
+        return self.outcomes.count(False) / len(self.outcomes) if self.outcomes else 0.0
+
+    def percentile(self, p):
+        if not self.latencies:
+            return None
+        values = sorted(self.latencies)
+        return values[min(len(values) - 1, int(len(values) * p))]
+
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at < AI_CIRCUIT_COOLDOWN:
+            return 'open'
+        return 'half-open'
+
+    def available(self):
+        """Whether calls may go to this provider now (one trial at a time when half-open)."""
+        state = self.state()
+        return state == 'closed' or (state == 'half-open' and not self.trial_running)
+
+    def begin(self):
+        state = self.state()
+        if state == 'closed':
+            return 'call'
+        if state == 'half-open' and not self.trial_running:
+            self.trial_running = True
+            return 'trial'
+        return None
+
+
+class RateLimiter:
+    """Token bucket allowing `per_minute` calls a minute, in bursts of up to a tenth of that."""
+
+    def __init__(self, per_minute):
+        self.rate = per_minute / 60
+        self.capacity = max(1.0, per_minute / 10)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def reserve(self):
+        """Take one call's token; returns the seconds to wait before making the call."""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        # Tokens may go negative: later callers queue up behind earlier ones
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+_lock = threading.Lock()
+_health = {}
+_limiters = {}
+_health_pid = None
+
+
+def _reset_after_fork():
+    global _health_pid
+    if _health_pid != os.getpid():
+        _health.clear()
+        _limiters.clear()
+        _health_pid = os.getpid()
+
+
+def _get_health(provider):
+    _reset_after_fork()
+    health = _health.get(provider)
+    if health is None:
+        health = _health[provider] = ProviderHealth(AI_HEALTH_WINDOW)
+    return health
+
+
+def begin(provider):
+    """
+    Reserve a call to a provider just before making it. Returns the call's
+    ticket: 'trial' for the one call let through a half-open circuit, 'call'
+    when the circuit is closed, or None when the provider may not be called
+    now (open, or another request already holds the trial).
+    """
+    with _lock:
+        return _get_health(provider).begin()
+
+
+def abandon(provider, ticket):
+    """Forget a started call that ended without an outcome (lost a hedge race, client went away)."""
+    if ticket == 'trial':
+        with _lock:
+            _get_health(provider).trial_running = False
+
+
+def record(provider, latency, ok, ticket='call'):
+    """
+    Record the outcome of one call to a provider. latency=None records only
+    the outcome (streams: time to the first chunk is not an answer's latency).
+    """
+    with _lock:
+        _get_health(provider).record(latency, ok, ticket)
+
+
+async def throttle(provider):
+    """Wait until a call to the provider fits its rate limit (returns at once when unlimited)."""
+    per_minute = AI_RATE_LIMITS.get(provider)
+    if not per_minute:
+        return
+    with _lock:
+        _reset_after_fork()
+        limiter = _limiters.get(provider)
+        if limiter is None:
+            limiter = _limiters[provider] = RateLimiter(per_minute)
+        wait = limiter.reserve()
+    if wait > 0:
+        await asyncio.sleep(wait)
+
+
+def hedge_delay(provider):
+    """Seconds to wait for a provider before firing the next one: its p95 latency, bounded."""
+    with _lock:
+        p95 = _get_health(provider).percentile(0.95)
+    if p95 is None:
+        return AI_HEDGE_MAX_DELAY
+    return min(AI_HEDGE_MAX_DELAY, max(AI_HEDGE_MIN_DELAY, p95))
+
+
+def _configured_clients():
+    from ai_assistant import get_async_openai_client, get_async_perplexity_client
+    getters = {'perplexity': get_async_perplexity_client, 'openai': get_async_openai_client}
+    for provider in PROVIDER_MODELS:
+        client = getters[provider]()
+        if client:
+            yield provider, client
+
+
+def is_configured():
+    """Whether any provider has an API key, regardless of its health."""
+    return any(True for _ in _configured_clients())
+
+
+def candidates():
+    """
+    Configured providers that may be called now, best first, as
+    (client, provider, model). Providers with an open circuit are left out;
+    ones with a high recent error rate go last. Nothing is reserved here:
+    begin() decides, when the call is made, which request gets a trial.
+    """
+    route = []
+    with _lock:
+        for provider, client in _configured_clients():
+            health = _get_health(provider)
+            if health.available():
+                route.append((health.error_rate > AI_DEMOTE_ERROR_RATE, client, provider))
+    route.sort(key=lambda item: item[0])
+    return [(client, provider, PROVIDER_MODELS[provider]) for _, client, provider in route]
+
+
+async def _call(client, provider, model, messages, params):
+    ticket = begin(provider)
+    if ticket is None:
+        raise RuntimeError(f'{provider} is not taking calls (circuit open or trial call running)')
+    started = time.monotonic()
+    try:
+        await throttle(provider)
+        started = time.monotonic()
+        response = await client.chat.completions.create(model=model, messages=messages, **params)
+    except asyncio.CancelledError:
+        # Lost a hedge race (or ran out of time): says nothing about health
+        abandon(provider, ticket)
+        raise
+    except Exception:
+        record(provider, time.monotonic() - started, False, ticket)
+        raise
+    record(provider, time.monotonic() - started, True, ticket)
+    return response.choices[0].message.content
+
+
+async def _hedged(route, messages, params):
+    """Try the route in order, starting the next provider when one is slow or fails."""
+    pending = set()
+    last_error = None
+    try:
+        for index, (client, provider, model) in enumerate(route):
+            pending.add(asyncio.ensure_future(_call(client, provider, model, messages, params)))
+            is_last = index == len(route) - 1
+            delay = None if is_last else hedge_delay(provider)
+
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=delay, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break  # Too slow: hedge with the next provider
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                if not is_last:
+                    break  # Failed: move on to the next provider right away
+        raise last_error or RuntimeError('No AI provider answered')
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+def complete(messages, route=None, **params):
+    """
+    Get a chat completion from the healthiest providers, hedging slow calls.
+
+    Args:
+        messages: Chat messages (the same for every provider)
+        route: Optional result of candidates() to use
+        params: Extra completion arguments (max_tokens, temperature, ...)
+
+    Returns:
+        The answer text
+    """
+    route = route if route is not None else candidates()
+    if not route:
+        raise RuntimeError('No AI provider available')
+    return ai_runtime.run(_hedged(route, messages, params))
+
+
+def get_stats():
+    """Health summary per provider seen by this worker."""
+    with _lock:
+        stats = {}
+        for provider in PROVIDER_MODELS:
+            health = _get_health(provider)
+            p50, p95 = health.percentile(0.5), health.percentile(0.95)
+            stats[provider] = {
+                'state': health.state(),
+                'calls': len(health.outcomes),
+                'error_rate': round(health.error_rate, 3),
+                'p50_ms': round(p50 * 1000) if p50 is not None else None,
+                'p95_ms': round(p95 * 1000) if p95 is not None else None,
+                'consecutive_failures': health.consecutive_failures,
+                'rate_limit_per_minute': AI_RATE_LIMITS.get(provider),
+            }
+        return stats
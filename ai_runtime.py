@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Async execution runtime for LLM calls.
+Each process runs one background asyncio event loop; request threads
+submit coroutines (async OpenAI client calls) to it and wait for the
+result. Many in-flight LLM calls then share one loop and connection pool
+instead of each holding its own blocking socket, and an admission limit
+keeps AI requests from taking every server thread.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Most AI requests a worker serves at once; the rest get 503 immediately
+AI_MAX_INFLIGHT = int(os.getenv('AI_MAX_INFLIGHT', 4))
+# Upper bound (seconds) a request thread waits for an LLM call
+AI_CALL_TIMEOUT = float(os.getenv('AI_CALL_TIMEOUT', 110))
+# Default time budget (seconds) for all LLM calls made by one request
+AI_REQUEST_DEADLINE = float(os.getenv('AI_REQUEST_DEADLINE', 45))
+
+_deadline = contextvars.ContextVar('ai_deadline', default=None)
+
+
+class ForkSafeSlots:
+    """
+    A fixed number of slots per process, taken without waiting. The
+    semaphore is rebuilt after a fork: a forked child starts with its own,
+    empty set of slots instead of the parent's counts.
+    """
+
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._semaphore = None
+        self._pid = None
+
+    def try_acquire(self):
+        """Take a slot; False if all are taken."""
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._semaphore = threading.BoundedSemaphore(self.size)
+                    self._pid = os.getpid()
+        return self._semaphore.acquire(blocking=False)
+
+    def release(self):
+        """Give back a slot taken by try_acquire."""
+        self._semaphore.release()
+
+
+_lock = threading.Lock()
+_loop = None
+_loop_pid = None
+_admission = ForkSafeSlots(AI_MAX_INFLIGHT)
+
+
+def get_loop():
+    """Get this process's AI event loop, starting it on first use (and after fork)."""
+    global _loop, _loop_pid
+    if _loop is not None and _loop_pid == os.getpid():
+        return _loop
+    with _lock:
+        if _loop is None or _loop_pid != os.getpid():
+            loop = asyncio.new_event_loop()
+            thread = threading.Thread(target=loop.run_forever, name='ai-event-loop', daemon=True)
+            thread.start()
+            _loop, _loop_pid = loop, os.getpid()
+    return _loop
+
+
+@contextmanager
+def deadline(seconds=None):
+    """Give every LLM call made inside the block a shared time budget."""
+    token = _deadline.set(time.monotonic() + (seconds or AI_REQUEST_DEADLINE))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining():
+    """Seconds left before the current deadline, or None without one."""
+    expires = _deadline.get()
+    return None if expires is None else expires - time.monotonic()
+
+
+def run(coro, timeout=None):
+    """
+    Run a coroutine on the AI loop and block the calling thread for its result.
+    The wait is bounded by the current deadline; on timeout the coroutine is
+    cancelled, which also aborts its HTTP request.
+    """
+    timeout = timeout or AI_CALL_TIMEOUT
+    left = remaining()
+    if left is not None:
+        if left <= 0:
+            coro.close()
+            raise TimeoutError('AI request deadline exceeded')
+        timeout = min(timeout, left)
+    
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    try:
+        return future.result(timeout)
+    except Exception:
+        future.cancel()
+        raise
+
+
+def iterate(async_iterable, timeout=None):
+    """
+    Consume an async iterator (e.g. a streamed completion) from a request
+    thread, one item at a time. Each item is waited for with run(), so the
+    current deadline still applies; the iterator is closed when the caller
+    stops early (e.g. the client disconnected).
+    """
+    iterator = async_iterable.__aiter__()
+    try:
+        while True:
+            try:
+                yield run(iterator.__anext__(), timeout)
+            except StopAsyncIteration:
+                return
+    finally:
+        close = getattr(iterator, 'aclose', None) or getattr(iterator, 'close', None)
+        if close is not None:
+            try:
+                run(close(), timeout=5)
+            except Exception:
+                pass
+
+
+def try_admit():
+    """Reserve an AI slot for this request; False if the worker is saturated."""
+    return _admission.try_acquire()
+
+
+def release():
+    """Release a slot reserved by try_admit."""
+    _admission.release()
@@ -7,11 +7,28 @@ Breakfast Decision Web Application
 - Redraw until you find something you like
 """
 
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, make_response, request, url_for
 from flask_cors import CORS
-import sqlite3
+import base64
+import binascii
 import os
-import random
+import time
+from functools import wraps
+import ai_runtime
+import bulk_generate
+import compression
+import counters
+import db
+import draw_engine
+import image_pipeline
+import jobs
+import meal_plan
+import prewarm
+from compression import PrecompressedPage
+from http_cache import conditional
+from json_provider import FastJSONProvider
+from catalog import get_catalog, get_generation, encode_cursor, decode_cursor
+from recipe_loader import load_recipe, load_recipes, load_confirmed_recipe
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
 
@@ -19,16 +36,36 @@ load_dotenv()
 
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY', 'dev-secret-key')
+app.json = FastJSONProvider(app)
 CORS(app)
+db.init_app(app)
+compression.init_app(app)
 
-DB_PATH = os.path.join(os.path.dirname(__file__), 'breakfast.db')
+DB_PATH = db.DB_PATH
+
+# Page sizes for /api/recipes
+DEFAULT_RECIPES_PAGE = int(os.getenv('DEFAULT_RECIPES_PAGE', 50))
+MAX_RECIPES_PAGE = int(os.getenv('MAX_RECIPES_PAGE', 200))
+
+# Upper bounds for batch draws and meal plans
+MAX_DRAW_COUNT = int(os.getenv('MAX_DRAW_COUNT', 10))
+MAX_PLAN_DAYS = int(os.getenv('MAX_PLAN_DAYS', 31))
+
+# Largest request body: an image upload, allowing for base64 from older clients
+UPLOAD_MAX_REQUEST_BYTES = image_pipeline.UPLOAD_MAX_BYTES * 4 // 3 + 64 * 1024
+app.config['MAX_CONTENT_LENGTH'] = UPLOAD_MAX_REQUEST_BYTES
+
+# Longest a job's SSE status stream stays open (it holds a server thread)
+JOB_EVENTS_MAX_SECONDS = float(os.getenv('JOB_EVENTS_MAX_SECONDS', 300))
+# Open job SSE streams per worker; more get 503 and should poll /api/jobs/<id>
+JOB_EVENTS_MAX_STREAMS = int(os.getenv('JOB_EVENTS_MAX_STREAMS', 2))
+
+_job_streams = ai_runtime.ForkSafeSlots(JOB_EVENTS_MAX_STREAMS)
 
 
 def get_db_connection():
-    """Get database connection."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    return conn
+    """Get this worker thread's pooled database connection."""
+    return db.get_connection()
 
 
 def get_tomorrow_date():
@@ -36,82 +73,89 @@ def get_tomorrow_date():
     return (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
 
 
+def build_index_page():
+    """Render the main page once and precompress it."""
+    with app.app_context():
+        return PrecompressedPage(render_template('index.html'))
+
+
 @app.route('/')
 def index():
-    """Serve the main page."""
-    return render_template('index.html')
+    """Serve the main page from its precompressed variants."""
+    global INDEX_PAGE
+    if app.debug:
+        # Pick up template edits while developing
+        INDEX_PAGE = build_index_page()
+    return INDEX_PAGE.response()
 
 
 @app.route('/api/recipes', methods=['GET'])
+@conditional('catalog', cache_control='public, no-cache')
 def get_all_recipes():
-    """Get all recipes with their ratings."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT r.*, n.calories, n.protein, n.carbohydrate, n.fat, n.fiber
-        FROM recipes r
-        LEFT JOIN nutrition n ON r.id = n.recipe_id
-        ORDER BY r.user_rating DESC
-    ''')
-    recipes = [dict(row) for row in cursor.fetchall()]
-    
-    conn.close()
-    return jsonify(recipes)
+    """
+    Get recipes ordered by rating, one keyset page at a time.
+    Query params: limit (capped), cursor (from the X-Next-Cursor header of
+    the previous page) and fields (comma-separated columns to return).
+    """
+    limit = max(1, min(MAX_RECIPES_PAGE, request.args.get('limit', DEFAULT_RECIPES_PAGE, type=int)))
+    
+    after = None
+    if request.args.get('cursor'):
+        try:
+            after = decode_cursor(request.args['cursor'])
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+    
+    catalog = get_catalog(get_db_connection())
+    recipes, last = catalog.page(limit, after)
+    
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()]
+    if fields:
+        known = recipes[0].keys() if recipes else fields
+        unknown = [f for f in fields if f not in known]
+        if unknown:
+            return jsonify({'error': f'Unknown fields: {", ".join(unknown)}'}), 400
+        recipes = [{f: recipe[f] for f in fields} for recipe in recipes]
+    
+    response = jsonify(list(recipes))
+    if last is not None:
+        next_cursor = encode_cursor(last)
+        response.headers['X-Next-Cursor'] = next_cursor
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        response.headers['Link'] = f'<{url_for("get_all_recipes", **args)}>; rel="next"'
+    return response
 
 
 @app.route('/api/draw', methods=['GET'])
 def draw_dish():
-    """Draw a random dish weighted by user rating."""
+    """
+    Draw a random dish weighted by user rating.
+    With ?k=N, draw N distinct dishes (without replacement) in one call.
+    """
     conn = get_db_connection()
-    cursor = conn.cursor()
     
-    # Get all recipes with their ratings
-    cursor.execute('''
-        SELECT r.*, n.calories, n.protein, n.carbohydrate, n.fat, n.fiber
-        FROM recipes r
-        LEFT JOIN nutrition n ON r.id = n.recipe_id
-    ''')
-    recipes = [dict(row) for row in cursor.fetchall()]
-    
-    if not recipes:
-        conn.close()
-        return jsonify({'error': 'No recipes available'}), 404
+    if 'k' in request.args:
+        k = max(1, min(MAX_DRAW_COUNT, request.args.get('k', 1, type=int)))
+        selected_ids = draw_engine.draw_many(conn, k)
+        selected = load_recipes(conn, selected_ids)
+        
+        for recipe_id in selected_ids:
+            counters.times_drawn.add(recipe_id)
+        
+        return jsonify(selected)
     
     # Weighted random selection based on rating (rating^2 for stronger effect)
-    weights = [(r['user_rating'] or 3.0) ** 2 for r in recipes]
-    total_weight = sum(weights)
-    weights = [w / total_weight for w in weights]
-    
-    selected = random.choices(recipes, weights=weights, k=1)[0]
+    selected_id = draw_engine.draw(conn)
     
-    # Get ingredients for the selected recipe
-    cursor.execute('''
-        SELECT ingredient_name, quantity, unit, notes
-        FROM ingredients
-        WHERE recipe_id = ?
-    ''', (selected['id'],))
-    ingredients = [dict(row) for row in cursor.fetchall()]
+    if selected_id is None:
+        return jsonify({'error': 'No recipes available'}), 404
     
-    # Get instructions
-    cursor.execute('''
-        SELECT step_number, instruction
-        FROM instructions
-        WHERE recipe_id = ?
-        ORDER BY step_number
-    ''', (selected['id'],))
-    instructions = [dict(row) for row in cursor.fetchall()]
-    
-    # Update times_drawn
-    cursor.execute('''
-        UPDATE recipes SET times_drawn = times_drawn + 1 WHERE id = ?
-    ''', (selected['id'],))
-    conn.commit()
+    selected = load_recipe(conn, selected_id)
     
-    selected['ingredients'] = ingredients
-    selected['instructions'] = instructions
+    # Update times_drawn (buffered, written in batches)
+    counters.times_drawn.add(selected_id)
     
-    conn.close()
     return jsonify(selected)
 
 
@@ -119,82 +163,65 @@ def draw_dish():
 def draw_for_tomorrow():
     """Draw a dish for tomorrow and save it."""
     conn = get_db_connection()
-    cursor = conn.cursor()
     
     tomorrow = get_tomorrow_date()
     
     # Check if already have a confirmed dish for tomorrow
-    cursor.execute('''
-        SELECT r.*, n.calories, n.protein, n.carbohydrate, n.fat, n.fiber, dh.id as history_id
-        FROM draw_history dh
-        JOIN recipes r ON dh.recipe_id = r.id
-        LEFT JOIN nutrition n ON r.id = n.recipe_id
-        WHERE dh.draw_date = ? AND dh.confirmed = 1
-    ''', (tomorrow,))
-    
-    existing = cursor.fetchone()
+    existing = load_confirmed_recipe(conn, tomorrow)
     if existing:
-        result = dict(existing)
-        # Get ingredients
-        cursor.execute('''
-            SELECT ingredient_name, quantity, unit, notes
-            FROM ingredients WHERE recipe_id = ?
-        ''', (result['id'],))
-        result['ingredients'] = [dict(row) for row in cursor.fetchall()]
-        
-        # Get instructions
-        cursor.execute('''
-            SELECT step_number, instruction
-            FROM instructions WHERE recipe_id = ?
-            ORDER BY step_number
-        ''', (result['id'],))
-        result['instructions'] = [dict(row) for row in cursor.fetchall()]
-        
-        result['already_confirmed'] = True
-        conn.close()
-        return jsonify(result)
+        existing['already_confirmed'] = True
+        return jsonify(existing)
     
-    # Draw a new dish
-    cursor.execute('''
-        SELECT r.*, n.calories, n.protein, n.carbohydrate, n.fat, n.fiber
-        FROM recipes r
-        LEFT JOIN nutrition n ON r.id = n.recipe_id
-    ''')
-    recipes = [dict(row) for row in cursor.fetchall()]
+    # Draw a new dish (weighted random selection)
+    selected_id = draw_engine.draw(conn)
     
-    if not recipes:
-        conn.close()
+    if selected_id is None:
         return jsonify({'error': 'No recipes available'}), 404
     
-    # Weighted random selection
-    weights = [(r['user_rating'] or 3.0) ** 2 for r in recipes]
-    total_weight = sum(weights)
-    weights = [w / total_weight for w in weights]
-    
-    selected = random.choices(recipes, weights=weights, k=1)[0]
-    
-    # Get ingredients
-    cursor.execute('''
-        SELECT ingredient_name, quantity, unit, notes
-        FROM ingredients WHERE recipe_id = ?
-    ''', (selected['id'],))
-    selected['ingredients'] = [dict(row) for row in cursor.fetchall()]
-    
-    # Get instructions
-    cursor.execute('''
-        SELECT step_number, instruction
-        FROM instructions WHERE recipe_id = ?
-        ORDER BY step_number
-    ''', (selected['id'],))
-    selected['instructions'] = [dict(row) for row in cursor.fetchall()]
+    selected = load_recipe(conn, selected_id)
     
     selected['already_confirmed'] = False
     selected['draw_date'] = tomorrow
     
-    conn.close()
     return jsonify(selected)
 
 
+@app.route('/api/plan', methods=['GET', 'POST'])
+def plan_meals():
+    """
+    Plan breakfasts for the next ?days=N days (default 7) without repeats
+    inside ?window=N days. GET only previews the plan (it must stay free of
+    side effects for prefetchers); POST confirms every new day in one
+    transaction. Days confirmed meanwhile by another request come back with
+    the meal that request confirmed.
+    """
+    conn = get_db_connection()
+    
+    days = max(1, min(MAX_PLAN_DAYS, request.args.get('days', 7, type=int)))
+    window = max(1, min(MAX_PLAN_DAYS, request.args.get('window', meal_plan.PLAN_NO_REPEAT_DAYS, type=int)))
+    confirm = request.method == 'POST'
+    
+    plan = meal_plan.build_plan(conn, get_tomorrow_date(), days, window)
+    if not plan:
+        return jsonify({'error': 'No recipes available'}), 404
+    
+    confirmed_count = meal_plan.confirm_plan(conn, plan) if confirm else 0
+    
+    recipes = {r['id']: r for r in load_recipes(conn, {entry['recipe_id'] for entry in plan})}
+    days_out = [
+        dict(recipes[entry['recipe_id']], draw_date=entry['draw_date'],
+             already_confirmed=entry['already_confirmed'])
+        for entry in plan
+    ]
+    
+    return jsonify({
+        'days': days_out,
+        'confirmed': confirm,
+        'confirmed_count': confirmed_count,
+        'window': window
+    })
+
+
 @app.route('/api/confirm/<int:recipe_id>', methods=['POST'])
 def confirm_dish(recipe_id):
     """Confirm a dish for tomorrow."""
@@ -214,13 +241,13 @@ def confirm_dish(recipe_id):
         VALUES (?, ?, 1)
     ''', (recipe_id, tomorrow))
     
-    # Update times_drawn
-    cursor.execute('''
-        UPDATE recipes SET times_drawn = times_drawn + 1 WHERE id = ?
-    ''', (recipe_id,))
-    
     conn.commit()
-    conn.close()
+    
+    # Update times_drawn (buffered, written in batches)
+    counters.times_drawn.add(recipe_id)
+    
+    # Generate tomorrow's step explanations and ingredient tips ahead of time
+    prewarm.prewarm_in_background(recipe_id)
     
     return jsonify({'success': True, 'message': 'Dish confirmed for tomorrow!'})
 
@@ -242,7 +269,6 @@ def rate_dish(recipe_id):
     result = cursor.fetchone()
     
     if not result:
-        conn.close()
         return jsonify({'error': 'Recipe not found'}), 404
     
     current_rating = result['user_rating'] or 3.0
@@ -254,9 +280,12 @@ def rate_dish(recipe_id):
     cursor.execute('''
         UPDATE recipes SET user_rating = ? WHERE id = ?
     ''', (round(new_rating, 2), recipe_id))
+    generation = get_generation(conn)
     
     conn.commit()
-    conn.close()
+    
+    # Update this worker's draw weights in place
+    draw_engine.apply_rating(recipe_id, round(new_rating, 2), generation)
     
     return jsonify({
         'success': True, 
@@ -266,41 +295,15 @@ def rate_dish(recipe_id):
 
 
 @app.route('/api/recipe/<int:recipe_id>', methods=['GET'])
+@conditional('catalog', cache_control='public, no-cache')
 def get_recipe(recipe_id):
     """Get a specific recipe with all details."""
     conn = get_db_connection()
-    cursor = conn.cursor()
+    result = load_recipe(conn, recipe_id)
     
-    cursor.execute('''
-        SELECT r.*, n.calories, n.protein, n.carbohydrate, n.fat, n.fiber
-        FROM recipes r
-        LEFT JOIN nutrition n ON r.id = n.recipe_id
-        WHERE r.id = ?
-    ''', (recipe_id,))
-    
-    recipe = cursor.fetchone()
-    if not recipe:
-        conn.close()
+    if not result:
         return jsonify({'error': 'Recipe not found'}), 404
     
-    result = dict(recipe)
-    
-    # Get ingredients
-    cursor.execute('''
-        SELECT ingredient_name, quantity, unit, notes
-        FROM ingredients WHERE recipe_id = ?
-    ''', (recipe_id,))
-    result['ingredients'] = [dict(row) for row in cursor.fetchall()]
-    
-    # Get instructions
-    cursor.execute('''
-        SELECT step_number, instruction
-        FROM instructions WHERE recipe_id = ?
-        ORDER BY step_number
-    ''', (recipe_id,))
-    result['instructions'] = [dict(row) for row in cursor.fetchall()]
-    
-    conn.close()
     return jsonify(result)
 
 
@@ -310,50 +313,21 @@ def health_check():
     return jsonify({'status': 'healthy', 'time': datetime.now().isoformat()}), 200
 
 @app.route('/api/tomorrow', methods=['GET'])
+@conditional('catalog', 'history', key=get_tomorrow_date, cache_control='private, no-cache')
 def get_tomorrow_meal():
     """Get the confirmed meal for tomorrow."""
     conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    tomorrow = get_tomorrow_date()
+    meal = load_confirmed_recipe(conn, get_tomorrow_date())
     
-    cursor.execute('''
-        SELECT r.*, n.calories, n.protein, n.carbohydrate, n.fat, n.fiber
-        FROM draw_history dh
-        JOIN recipes r ON dh.recipe_id = r.id
-        LEFT JOIN nutrition n ON r.id = n.recipe_id
-        WHERE dh.draw_date = ? AND dh.confirmed = 1
-    ''', (tomorrow,))
-    
-    result = cursor.fetchone()
-    if not result:
-        conn.close()
+    if not meal:
         return jsonify({'confirmed': False, 'message': 'No meal confirmed for tomorrow yet'})
     
-    meal = dict(result)
-    
-    # Get ingredients
-    cursor.execute('''
-        SELECT ingredient_name, quantity, unit, notes
-        FROM ingredients WHERE recipe_id = ?
-    ''', (meal['id'],))
-    meal['ingredients'] = [dict(row) for row in cursor.fetchall()]
-    
-    # Get instructions
-    cursor.execute('''
-        SELECT step_number, instruction
-        FROM instructions WHERE recipe_id = ?
-        ORDER BY step_number
-    ''', (meal['id'],))
-    meal['instructions'] = [dict(row) for row in cursor.fetchall()]
-    
     meal['confirmed'] = True
-    
-    conn.close()
     return jsonify(meal)
 
 
 @app.route('/api/history', methods=['GET'])
+@conditional('catalog', 'history', cache_control='private, no-cache')
 def get_history():
     """Get draw history."""
     conn = get_db_connection()
@@ -368,7 +342,6 @@ def get_history():
     ''')
     
     history = [dict(row) for row in cursor.fetchall()]
-    conn.close()
     
     return jsonify(history)
 
@@ -377,7 +350,48 @@ def get_history():
 # AI Assistant Endpoints
 # ======================
 
+def ai_endpoint(view):
+    """
+    Serve an AI view only while this worker has a free AI slot, so slow
+    LLM calls can never occupy every server thread. All LLM calls in the
+    view share one deadline; clients may shorten it with X-Request-Timeout.
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if not ai_runtime.try_admit():
+            return jsonify({
+                'success': False,
+                'error': 'AI assistant is busy',
+                'response': '抱歉，AI助手正忙，请稍后再试。'
+            }), 503
+        budget = ai_runtime.AI_REQUEST_DEADLINE
+        requested = request.headers.get('X-Request-Timeout', type=float)
+        if requested and requested > 0:
+            budget = min(budget, requested)
+        streamed = False
+        try:
+            with ai_runtime.deadline(budget):
+                response = make_response(view(*args, **kwargs))
+            if response.is_streamed:
+                # A streamed answer keeps its slot until the stream is closed
+                response.call_on_close(ai_runtime.release)
+                streamed = True
+            return response
+        finally:
+            if not streamed:
+                ai_runtime.release()
+    return wrapper
+
+
+def sse_event(data, event=None):
+    """Format one Server-Sent Event."""
+    prefix = f'event: {event}\n' if event else ''
+    return f'{prefix}data: {app.json.dumps(data)}\n\n'
+
+
+
 @app.route('/api/ai/help', methods=['POST'])
+@ai_endpoint
 def ai_help():
     """Get AI help for cooking."""
     try:
@@ -399,7 +413,46 @@ def ai_help():
         return jsonify({'error': str(e), 'response': '抱歉，AI助手暂时无法使用。请稍后再试。'}), 500
 
 
+@app.route('/api/ai/help/stream', methods=['POST'])
+@ai_endpoint
+def ai_help_stream():
+    """
+    Get AI help for cooking as Server-Sent Events: a `data: {"delta": ...}`
+    event per chunk of the answer, then `event: done` (or `event: error`).
+    """
+    from ai_assistant import stream_cooking_help
+    
+    data = request.get_json()
+    question = data.get('question', '')
+    if not question:
+        return jsonify({'error': 'Question is required'}), 400
+    
+    chunks = stream_cooking_help(
+        data.get('recipe_name', ''),
+        data.get('steps', []),
+        question,
+        data.get('ingredients', [])
+    )
+    # The stream runs after this view returns, so it needs its own deadline
+    budget = ai_runtime.remaining()
+    
+    def events():
+        with ai_runtime.deadline(budget):
+            try:
+                for text in chunks:
+                    yield sse_event({'delta': text})
+                yield sse_event({}, event='done')
+            except Exception as e:
+                yield sse_event({'error': str(e)}, event='error')
+    
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
 @app.route('/api/ai/step/<int:recipe_id>/<int:step_number>', methods=['GET'])
+@ai_endpoint
 def ai_step_explanation(recipe_id, step_number):
     """Get detailed explanation for a cooking step."""
     try:
@@ -417,8 +470,6 @@ def ai_step_explanation(recipe_id, step_number):
         ''', (recipe_id, step_number))
         step = cursor.fetchone()
         
-        conn.close()
-        
         if not recipe or not step:
             return jsonify({'error': 'Recipe or step not found'}), 404
         
@@ -434,6 +485,7 @@ def ai_step_explanation(recipe_id, step_number):
 
 
 @app.route('/api/ai/ingredient/<ingredient_name>', methods=['GET'])
+@ai_endpoint
 def ai_ingredient_tips(ingredient_name):
     """Get tips for an ingredient."""
     try:
@@ -444,69 +496,63 @@ def ai_ingredient_tips(ingredient_name):
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/ai/cache-stats', methods=['GET'])
+def ai_cache_stats():
+    """Hit/miss counters of the persistent AI response cache."""
+    import ai_cache
+    return jsonify(ai_cache.get_stats())
+
+
+@app.route('/api/ai/providers', methods=['GET'])
+def ai_provider_health():
+    """Latency, error rate and circuit state per AI provider, as seen by this worker."""
+    import ai_router
+    return jsonify(ai_router.get_stats())
+
+
+def job_accepted(job_id):
+    """202 response pointing the client at a queued job's status."""
+    status_url = url_for('get_job_status', job_id=job_id)
+    response = jsonify({'success': True, 'job_id': job_id, 'status': 'queued', 'status_url': status_url})
+    response.status_code = 202
+    response.headers['Location'] = status_url
+    return response
+
+
 @app.route('/api/ai/upload-recipe', methods=['POST'])
 def upload_recipe_image():
-    """Upload an image and extract recipe data using AI."""
+    """
+    Upload an image and queue extraction of its recipe (202 + job id).
+    Accepts a multipart form with an `image` file (preferred) or, for older
+    clients, JSON with a base64 data URL in `image`.
+    """
     try:
-        from ai_assistant import extract_recipe_from_image, insert_recipe_to_db
-        
-        data = request.get_json()
-        image_base64 = data.get('image')
-        
-        if not image_base64:
+        # Refuse oversized uploads before reading the body
+        if request.content_length and request.content_length > UPLOAD_MAX_REQUEST_BYTES:
+            return jsonify({'success': False, 'error': '图片太大，请上传小于 {} MB 的图片'.format(
+                image_pipeline.UPLOAD_MAX_BYTES // (1024 * 1024))}), 413
+        
+        if request.files:
+            upload = request.files.get('image')
+            image_bytes = upload.read(image_pipeline.UPLOAD_MAX_BYTES + 1) if upload else b''
+        else:
+            data = request.get_json(silent=True) or {}
+            image_base64 = data.get('image') or ''
+            # Remove data URL prefix if present
+            if ',' in image_base64:
+                image_base64 = image_base64.split(',')[1]
+            try:
+                image_bytes = base64.b64decode(image_base64) if image_base64 else b''
+            except binascii.Error:
+                return jsonify({'success': False, 'error': '图片数据格式错误'}), 400
+        
+        if not image_bytes:
             return jsonify({'success': False, 'error': '未提供图片'}), 400
+        if len(image_bytes) > image_pipeline.UPLOAD_MAX_BYTES:
+            return jsonify({'success': False, 'error': '图片太大，请上传小于 {} MB 的图片'.format(
+                image_pipeline.UPLOAD_MAX_BYTES // (1024 * 1024))}), 413
         
-        # Remove data URL prefix if present
-        if ',' in image_base64:
-            image_base64 = image_base64.split(',')[1]
-        
-        # Extract recipe from image
-        recipe_data = extract_recipe_from_image(image_base64)
-        
-        if not recipe_data.get('success', False):
-            return jsonify(recipe_data), 400
-        
-        # Insert into database
-        insert_result = insert_recipe_to_db(recipe_data)
-        
-        if not insert_result.get('success', False):
-            return jsonify(insert_result), 500
-        
-        # Get the full recipe data to return
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        recipe_id = insert_result['recipe_id']
-        
-        cursor.execute('''
-            SELECT r.*, n.calories, n.protein, n.carbohydrate, n.fat, n.fiber
-            FROM recipes r
-            LEFT JOIN nutrition n ON r.id = n.recipe_id
-            WHERE r.id = ?
-        ''', (recipe_id,))
-        
-        recipe = dict(cursor.fetchone())
-        
-        cursor.execute('''
-            SELECT ingredient_name, quantity, unit, notes
-            FROM ingredients WHERE recipe_id = ?
-        ''', (recipe_id,))
-        recipe['ingredients'] = [dict(row) for row in cursor.fetchall()]
-        
-        cursor.execute('''
-            SELECT step_number, instruction
-            FROM instructions WHERE recipe_id = ?
-            ORDER BY step_number
-        ''', (recipe_id,))
-        recipe['instructions'] = [dict(row) for row in cursor.fetchall()]
-        
-        conn.close()
-        
-        return jsonify({
-            'success': True,
-            'message': insert_result['message'],
-            'recipe': recipe
-        })
+        return job_accepted(jobs.enqueue('extract_recipe', {}, blob=image_bytes))
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -514,74 +560,111 @@ def upload_recipe_image():
 
 @app.route('/api/ai/generate-recipe', methods=['POST'])
 def generate_recipe():
-    """Generate a recipe from dish name using AI."""
+    """Queue generation of a recipe from a dish name (202 + job id)."""
     try:
-        from ai_assistant import generate_recipe_from_name, insert_recipe_to_db
-        
         data = request.get_json()
         dish_name = data.get('dish_name', '').strip()
         
         if not dish_name:
             return jsonify({'success': False, 'error': '请提供菜品名称'}), 400
         
-        # Generate recipe
-        recipe_data = generate_recipe_from_name(dish_name)
-        
-        if not recipe_data.get('success', False):
-            return jsonify(recipe_data), 400
-        
-        # Insert into database
-        insert_result = insert_recipe_to_db(recipe_data)
-        
-        if not insert_result.get('success', False):
-            return jsonify(insert_result), 500
-        
-        # Get the full recipe data to return
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        recipe_id = insert_result['recipe_id']
-        
-        cursor.execute('''
-            SELECT r.*, n.calories, n.protein, n.carbohydrate, n.fat, n.fiber
-            FROM recipes r
-            LEFT JOIN nutrition n ON r.id = n.recipe_id
-            WHERE r.id = ?
-        ''', (recipe_id,))
-        
-        recipe = dict(cursor.fetchone())
-        
-        cursor.execute('''
-            SELECT ingredient_name, quantity, unit, notes
-            FROM ingredients WHERE recipe_id = ?
-        ''', (recipe_id,))
-        recipe['ingredients'] = [dict(row) for row in cursor.fetchall()]
-        
-        cursor.execute('''
-            SELECT step_number, instruction
-            FROM instructions WHERE recipe_id = ?
-            ORDER BY step_number
-        ''', (recipe_id,))
-        recipe['instructions'] = [dict(row) for row in cursor.fetchall()]
-        
-        conn.close()
-        
-        return jsonify({
-            'success': True,
-            'message': insert_result['message'],
-            'recipe': recipe
-        })
+        return job_accepted(jobs.enqueue('generate_recipe', {'dish_name': dish_name}))
         
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
+@app.route('/api/ai/generate-recipes', methods=['POST'])
+def generate_recipes():
+    """
+    Queue generation of recipes for a list of dish names (202 + job id).
+    The finished job's result reports the status of every dish.
+    """
+    try:
+        data = request.get_json()
+        dish_names = data.get('dish_names', [])
+        if not isinstance(dish_names, list):
+            return jsonify({'success': False, 'error': 'dish_names 必须是列表'}), 400
+
+        dish_names = bulk_generate.clean_dish_names(dish_names)
+        if not dish_names:
+            return jsonify({'success': False, 'error': '请提供菜品名称'}), 400
+        if len(dish_names) > bulk_generate.BULK_GENERATE_MAX_DISHES:
+            return jsonify({'success': False, 'error': '一次最多生成 {} 个食谱'.format(
+                bulk_generate.BULK_GENERATE_MAX_DISHES)}), 400
+
+        return job_accepted(jobs.enqueue('generate_recipes', {'dish_names': dish_names}))
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """
+    Status of a background job: queued, running, done or failed. Finished
+    jobs carry the same `result` the synchronous endpoint used to return.
+    """
+    jobs.ensure_workers()
+    job = jobs.get_job(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    return jsonify(job)
+
+
+@app.route('/api/jobs/<job_id>/events', methods=['GET'])
+def stream_job_status(job_id):
+    """
+    Job status as Server-Sent Events: one event per status change, until it
+    finishes. Each stream holds a server thread, so only JOB_EVENTS_MAX_STREAMS
+    are served per worker at once; beyond that clients get 503 and should poll.
+    """
+    jobs.ensure_workers()
+    if jobs.get_job(job_id) is None:
+        return jsonify({'success': False, 'error': 'Job not found'}), 404
+    if not _job_streams.try_acquire():
+        response = jsonify({'success': False, 'error': 'Too many open streams, poll /api/jobs/<id> instead'})
+        response.status_code = 503
+        response.headers['Retry-After'] = '1'
+        return response
+    
+    def events():
+        last_status = None
+        give_up = time.monotonic() + JOB_EVENTS_MAX_SECONDS
+        while time.monotonic() < give_up:
+            job = jobs.get_job(job_id)
+            db.release_connection()
+            if job is None:
+                yield sse_event({'error': 'Job not found'}, event='error')
+                return
+            if job['status'] != last_status:
+                last_status = job['status']
+                yield sse_event(job, event=job['status'])
+            if job['status'] in jobs.FINISHED:
+                return
+            time.sleep(jobs.JOB_POLL_SECONDS)
+        yield sse_event({'error': 'Timed out, poll /api/jobs/<id> instead'}, event='error')
+    
+    response = Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+    response.call_on_close(_job_streams.release)
+    return response
+
+
+INDEX_PAGE = build_index_page()
+
+
 if __name__ == '__main__':
     # Check if database exists
     if not os.path.exists(DB_PATH):
         print("⚠️  Database not found. Please run init_db.py first!")
         exit(1)
     
+    from migrations import migrate
+    migrate(db.get_connection())
+    
     print("🍳 Starting Breakfast Decision System...")
     print("📍 Open http://localhost:5000 in your browser")
     print("📱 Phone Access: http://<your-ip-address>:5000")
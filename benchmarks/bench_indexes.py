@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Benchmark: lookup queries before and after the index migrations.
+Builds a large synthetic database in a temp directory, times the hot
+lookups on the baseline schema, applies migrations and times them again.
+
+Usage:
+    python benchmarks/bench_indexes.py [recipes] [history_days]
+"""
+
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import db
+from init_db import create_tables
+from migrations import migrate
+
+QUERIES = {
+    'ingredients by recipe': (
+        'SELECT ingredient_name, quantity, unit, notes FROM ingredients WHERE recipe_id = ?',
+        lambda n_recipes, dates: (random.randint(1, n_recipes),),
+    ),
+    'instructions by recipe': (
+        'SELECT step_number, instruction FROM instructions WHERE recipe_id = ? ORDER BY step_number',
+        lambda n_recipes, dates: (random.randint(1, n_recipes),),
+    ),
+    'nutrition by recipe': (
+        'SELECT calories FROM nutrition WHERE recipe_id = ?',
+        lambda n_recipes, dates: (random.randint(1, n_recipes),),
+    ),
+    'confirmed draw for date': (
+        'SELECT recipe_id FROM draw_history WHERE draw_date = ? AND confirmed = 1',
+        lambda n_recipes, dates: (random.choice(dates),),
+    ),
+}
+
+
+def build(conn, n_recipes, history_days):
+    """Fill the baseline schema with synthetic rows."""
+    create_tables(conn)
+    conn.executemany(
+        'INSERT INTO recipes (id, recipe_name) VALUES (?, ?)',
+        [(i, f'recipe {i}') for i in range(1, n_recipes + 1)]
+    )
+    conn.executemany(
+        'INSERT INTO ingredients (recipe_id, ingredient_name, quantity, unit) VALUES (?, ?, 1, "g")',
+        [(i, f'ingredient {j}') for i in range(1, n_recipes + 1) for j in range(10)]
+    )
+    conn.executemany(
+        'INSERT INTO instructions (recipe_id, step_number, instruction) VALUES (?, ?, ?)',
+        [(i, j, f'step {j}') for i in range(1, n_recipes + 1) for j in range(1, 7)]
+    )
+    conn.executemany(
+        'INSERT INTO nutrition (recipe_id, calories) VALUES (?, 300)',
+        [(i,) for i in range(1, n_recipes + 1)]
+    )
+
+    # Several unconfirmed redraws per day plus one confirmed pick
+    start = date(2000, 1, 1)
+    dates = [(start + timedelta(days=d)).isoformat() for d in range(history_days)]
+    rows = []
+    for day in dates:
+        for _ in range(5):
+            rows.append((random.randint(1, n_recipes), day, 0))
+        rows.append((random.randint(1, n_recipes), day, 1))
+    conn.executemany(
+        'INSERT INTO draw_history (recipe_id, draw_date, confirmed) VALUES (?, ?, ?)', rows
+    )
+    conn.commit()
+    return dates
+
+
+def run(conn, n_recipes, dates, iterations=500):
+    """Time each query; returns {name: (ms per query, plan)}."""
+    results = {}
+    for name, (sql, make_params) in QUERIES.items():
+        plan = ' / '.join(row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql, make_params(n_recipes, dates)))
+        params = [make_params(n_recipes, dates) for _ in range(iterations)]
+        started = time.perf_counter()
+        for p in params:
+            conn.execute(sql, p).fetchall()
+        elapsed = time.perf_counter() - started
+        results[name] = (elapsed / iterations * 1000, plan)
+    return results
+
+
+def main():
+    n_recipes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    history_days = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = db.connect(os.path.join(tmp, 'bench.db'))
+        print(f"📦 Building {n_recipes} recipes and {history_days} days of history...")
+        dates = build(conn, n_recipes, history_days)
+
+        before = run(conn, n_recipes, dates)
+        migrate(conn)
+        after = run(conn, n_recipes, dates)
+        conn.close()
+
+    print(f"\n{'query':<26}{'before ms':>12}{'after ms':>12}{'speedup':>10}")
+    for name in QUERIES:
+        b, a = before[name][0], after[name][0]
+        print(f"{name:<26}{b:>12.3f}{a:>12.3f}{b / a:>9.0f}x")
+    print("\nQuery plans:")
+    for name in QUERIES:
+        print(f"  {name}\n    before: {before[name][1]}\n    after:  {after[name][1]}")
+
+
+if __name__ == '__main__':
+    main()
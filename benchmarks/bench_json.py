@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: JSON serialization paths for API payloads.
+Compares Flask's previous default (stdlib json, ASCII-escaped, sorted keys)
+with the stdlib and orjson paths of FastJSONProvider, on a catalog page
+and on full recipes built from the seed data.
+
+Usage:
+    python benchmarks/bench_json.py [iterations]
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import db
+import init_db
+from migrations import migrate
+from recipe_loader import load_recipes
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def row_default(o):
+    if isinstance(o, sqlite3.Row):
+        return dict(zip(o.keys(), o))
+    raise TypeError(type(o).__name__)
+
+
+def flask_default(obj):
+    """Flask's previous default settings."""
+    return json.dumps(obj, ensure_ascii=True, sort_keys=True).encode('utf-8')
+
+
+def stdlib_fast(obj):
+    """FastJSONProvider without orjson."""
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'), default=row_default).encode('utf-8')
+
+
+def orjson_fast(obj):
+    """FastJSONProvider with orjson."""
+    return orjson.dumps(obj, default=row_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def timeit(fn, payload, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn(payload)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = db.connect(os.path.join(tmp, 'bench.db'))
+        init_db.create_tables(conn)
+        migrate(conn)
+        # Replicate the seed set to a catalog of a realistic size
+        for i in range(20):
+            init_db.insert_recipes(conn, [dict(r, recipe_name=f"{r['recipe_name']} #{i}") for r in init_db.RECIPES])
+
+        catalog_rows = conn.execute('''
+            SELECT r.*, n.calories, n.protein, n.carbohydrate, n.fat, n.fiber
+            FROM recipes r LEFT JOIN nutrition n ON r.id = n.recipe_id
+        ''').fetchall()
+        ids = [row['id'] for row in catalog_rows]
+        payloads = {
+            'catalog (dicts)': [dict(row) for row in catalog_rows],
+            'catalog (sqlite3.Row)': catalog_rows,
+            'full recipes x10': load_recipes(conn, ids[:10]),
+        }
+        conn.close()
+
+    paths = [('flask default', flask_default), ('stdlib fast', stdlib_fast)]
+    if orjson is not None:
+        paths.append(('orjson', orjson_fast))
+    else:
+        print("⚠️  orjson not installed: only stdlib paths measured")
+
+    print(f"\n{'payload':<24}" + ''.join(f'{name:>16}' for name, _ in paths) + f"{'bytes':>22}")
+    for label, payload in payloads.items():
+        timings, sizes = [], []
+        for name, fn in paths:
+            if name == 'flask default' and label == 'catalog (sqlite3.Row)':
+                # The old path had to copy rows into dicts first
+                fn = lambda rows, fn=fn: fn([dict(r) for r in rows])
+            timings.append(timeit(fn, payload, iterations))
+            sizes.append(len(fn(payload)))
+        print(f'{label:<24}' + ''.join(f'{t:>13.1f} µs' for t in timings)
+              + f"  {' / '.join(str(s) for s in sizes):>20}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: keyword matching for offline answers.
+Compares a linear scan (`keyword in question` for every keyword, as the
+old fallback did, but collecting every match so answers can be ranked)
+with the Aho-Corasick automaton in knowledge.py, for knowledge bases of
+growing size.
+
+Usage:
+    python benchmarks/bench_knowledge.py [iterations]
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from knowledge import KnowledgeBase, knowledge_base
+
+QUESTIONS = [
+    '鸡蛋要煮多久才能熟透呢',
+    '没有牛奶可以用什么代替',
+    '火候怎么掌握，大火还是小火',
+    '粥熬糊了粘锅怎么办',
+    '这道菜可以提前一晚准备吗',
+]
+
+
+def synthetic_data(size):
+    """The real knowledge base padded with random two/three-character keywords."""
+    rng = random.Random(0)
+    chars = [chr(c) for c in range(0x4e00, 0x4e00 + 3000)]
+    answers = [dict(entry) for entry in knowledge_base.answers]
+    while sum(len(entry['keywords']) for entry in answers) < size:
+        answers.append({
+            'keywords': [''.join(rng.choices(chars, k=rng.choice((2, 3)))) for _ in range(20)],
+            'answer': 'synthetic',
+        })
+    return {'answers': answers, 'ingredients': [], 'default_answer': ''}
+
+
+def linear_scan(answers, question):
+    return [entry['answer'] for entry in answers
+            if any(keyword in question for keyword in entry['keywords'])]
+
+
+def timed(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for question in QUESTIONS:
+            fn(question)
+    return (time.perf_counter() - started) / (iterations * len(QUESTIONS)) * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+    print(f"{'keywords':>10}{'linear µs':>12}{'automaton µs':>14}{'speedup':>10}")
+    for size in (50, 500, 5000, 20000):
+        data = synthetic_data(size)
+        kb = KnowledgeBase(data)
+        linear = timed(lambda q: linear_scan(data['answers'], q), iterations)
+        automaton = timed(kb.search, iterations)
+        print(f"{size:>10}{linear:>12.1f}{automaton:>14.1f}{linear / automaton:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Load test: slow LLM calls must not stall the rest of the site.
+Starts a mock OpenAI-compatible server that answers after a delay, runs
+the production launcher (python server.py with PRODUCTION=1: gunicorn,
+2 gthread workers x 8 threads) against a temporary database, floods
+/api/ai/help with distinct questions (so no cache or knowledge-base answer
+short-cuts the LLM) and measures /health, /api/draw and /api/rate latency
+at the same time.
+
+Usage:
+    python benchmarks/load_ai_isolation.py [ai_requests] [llm_delay_seconds]
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def mock_llm_handler(delay):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(delay)
+            body = json.dumps({
+                'id': 'mock', 'object': 'chat.completion', 'created': 0, 'model': 'mock',
+                'choices': [{'index': 0, 'finish_reason': 'stop',
+                             'message': {'role': 'assistant', 'content': '🍳 mock answer'}}],
+                'usage': {'prompt_tokens': 1, 'completion_tokens': 1, 'total_tokens': 2},
+            }).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+    return Handler
+
+
+def request(url, data=None):
+    """Return (status, seconds)."""
+    body = json.dumps(data).encode() if data is not None else None
+    req = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=120) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    return status, time.perf_counter() - started
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else float('nan')
+
+
+def main():
+    ai_requests = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    delay = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+
+    llm = ThreadingHTTPServer(('127.0.0.1', free_port()), mock_llm_handler(delay))
+    threading.Thread(target=llm.serve_forever, daemon=True).start()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        port = free_port()
+        env = dict(
+            os.environ,
+            PRODUCTION='1',
+            PORT=str(port),
+            WEB_CONCURRENCY='2',
+            GUNICORN_THREADS='8',
+            DB_PATH=os.path.join(tmp, 'bench.db'),
+            OPENAI_API_KEY='sk-mock',
+            OPENAI_BASE_URL=f'http://127.0.0.1:{llm.server_address[1]}/v1',
+            PERPLEXITY_API_KEY='',
+        )
+        # server.py brings the database up to date itself before starting gunicorn
+        server = subprocess.Popen(
+            [sys.executable, 'server.py'],
+            cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        base = f'http://127.0.0.1:{port}'
+        try:
+            for _ in range(300):
+                try:
+                    request(base + '/health')
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            else:
+                raise RuntimeError('server did not start')
+
+            print(f"🤖 {ai_requests} concurrent AI requests, mock LLM latency {delay}s")
+            ai_results, other_results = [], {'/health': [], '/api/draw': [], '/api/rate/1': []}
+            stop = threading.Event()
+
+            def probe():
+                while not stop.is_set():
+                    for path in other_results:
+                        data = {'rating': 4} if path.startswith('/api/rate') else None
+                        other_results[path].append(request(base + path, data))
+                    time.sleep(0.05)
+
+            probe_thread = threading.Thread(target=probe)
+            probe_thread.start()
+            with ThreadPoolExecutor(ai_requests) as pool:
+                ai_results = list(pool.map(
+                    lambda i: request(base + '/api/ai/help', {
+                        'question': f'第{i}次压测：这道菜有什么讲究',
+                        'recipe_name': f'压测菜品{i}',
+                    }),
+                    range(ai_requests)
+                ))
+            stop.set()
+            probe_thread.join()
+        finally:
+            server.terminate()
+            server.wait()
+            llm.shutdown()
+
+    statuses = {}
+    for status, _ in ai_results:
+        statuses[status] = statuses.get(status, 0) + 1
+    print(f"\n/api/ai/help statuses: {statuses} (503 = shed by the AI admission limit)")
+    print(f"\n{'endpoint':<14}{'requests':>10}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for path, results in other_results.items():
+        times = [t * 1000 for _, t in results]
+        print(f"{path:<14}{len(times):>10}{percentile(times, .5):>10.1f}"
+              f"{percentile(times, .95):>10.1f}{max(times, default=float('nan')):>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
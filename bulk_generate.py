@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Bulk recipe generation for seeding a catalog.
+Dishes are generated concurrently by a bounded thread pool (the LLM calls
+themselves are paced by ai_router's per-provider rate limits), and every
+generated recipe is inserted in one transaction. Runs as a background job
+behind POST /api/ai/generate-recipes, or from the command line:
+
+    python bulk_generate.py 葱油饼 豆浆 皮蛋瘦肉粥
+    python bulk_generate.py --file dishes.txt --concurrency 2
+"""
+
+import argparse
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+import ai_runtime
+import db
+
+load_dotenv()
+
+# Dishes generated at the same time
+BULK_GENERATE_CONCURRENCY = int(os.getenv('BULK_GENERATE_CONCURRENCY', 4))
+# Most dish names in one bulk request
+BULK_GENERATE_MAX_DISHES = int(os.getenv('BULK_GENERATE_MAX_DISHES', 50))
+# Time budget for all LLM calls of one dish (seconds)
+BULK_GENERATE_DISH_DEADLINE = float(os.getenv('BULK_GENERATE_DISH_DEADLINE', 90))
+
+
+def clean_dish_names(names):
+    """Dish names without blanks and repeats, in their original order."""
+    seen = set()
+    cleaned = []
+    for name in names:
+        name = str(name or '').strip()
+        if name and name not in seen:
+            seen.add(name)
+            cleaned.append(name)
+    return cleaned
+
+
+def _generate(dish_name):
+    from ai_assistant import generate_recipe_from_name
+
+    try:
+        # Pool threads do not inherit the caller's deadline: each dish gets its own
+        with ai_runtime.deadline(BULK_GENERATE_DISH_DEADLINE):
+            return generate_recipe_from_name(dish_name)
+    except Exception as e:
+        return {'success': False, 'error': str(e)}
+    finally:
+        db.release_connection()
+
+
+def generate_recipes(dish_names, concurrency=None):
+    """
+    Generate recipes for many dishes and add them to the catalog.
+
+    Args:
+        dish_names: Names of the dishes to generate
+        concurrency: Dishes generated at the same time (default BULK_GENERATE_CONCURRENCY)
+
+    Returns:
+        Dictionary with success status, counts and one item per dish:
+        dish_name, status ('created' or 'failed'), and recipe_id / recipe_name or error
+    """
+    from ai_assistant import insert_recipes_to_db
+
+    dish_names = clean_dish_names(dish_names)
+    if not dish_names:
+        return {'success': False, 'error': '请提供菜品名称'}
+    if len(dish_names) > BULK_GENERATE_MAX_DISHES:
+        return {'success': False, 'error': f'一次最多生成 {BULK_GENERATE_MAX_DISHES} 个食谱'}
+
+    workers = max(1, min(concurrency or BULK_GENERATE_CONCURRENCY, len(dish_names)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bulk-generate') as pool:
+        generated = list(pool.map(_generate, dish_names))
+
+    items = [{'dish_name': name} for name in dish_names]
+    pending = []
+    for item, recipe_data in zip(items, generated):
+        if recipe_data.get('success', False):
+            pending.append((item, recipe_data))
+        else:
+            item.update(status='failed', error=recipe_data.get('error', '生成失败'))
+
+    inserted = insert_recipes_to_db([recipe_data for _, recipe_data in pending])
+    for (item, recipe_data), result in zip(pending, inserted):
+        if result.get('success', False):
+            item.update(status='created', recipe_id=result['recipe_id'],
+                        recipe_name=recipe_data.get('recipe_name', '未命名'))
+        else:
+            item.update(status='failed', error=result.get('error'))
+
+    created = sum(1 for item in items if item['status'] == 'created')
+    result = {
+        'success': created > 0,
+        'created': created,
+        'failed': len(items) - created,
+        'items': items,
+        'message': f'✅ 成功添加 {created}/{len(items)} 个食谱',
+    }
+    if not created:
+        result['error'] = '没有成功生成的食谱'
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate recipes for many dishes and add them to the catalog.')
+    parser.add_argument('dish_names', nargs='*', help='Dish names')
+    parser.add_argument('--file', help='File with one dish name per line')
+    parser.add_argument('--concurrency', type=int, default=BULK_GENERATE_CONCURRENCY,
+                        help=f'Dishes generated at the same time (default {BULK_GENERATE_CONCURRENCY})')
+    args = parser.parse_args(argv)
+
+    dish_names = list(args.dish_names)
+    if args.file:
+        with open(args.file, encoding='utf-8') as f:
+            dish_names.extend(f.read().splitlines())
+
+    if not os.path.exists(db.DB_PATH):
+        print("⚠️  Database not found. Please run init_db.py first!")
+        return 1
+
+    from migrations import migrate
+    migrate(db.get_connection())
+
+    print(f"🍳 Generating {len(clean_dish_names(dish_names))} recipes ({args.concurrency} at a time)...")
+    result = generate_recipes(dish_names, concurrency=args.concurrency)
+    for item in result.get('items', []):
+        if item['status'] == 'created':
+            print(f"  ✅ {item['dish_name']} → #{item['recipe_id']} {item['recipe_name']}")
+        else:
+            print(f"  ❌ {item['dish_name']}: {item['error']}")
+    print(result.get('message') or f"❌ {result['error']}")
+    return 0 if result['success'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+In-process recipe catalog cache.
+Each worker keeps an immutable snapshot of recipes joined with nutrition.
+Triggers bump the 'catalog' row in the generations table on every catalog
+write, so a worker rebuilds its snapshot only when another writer (in any
+process) has changed the data.
+"""
+
+import base64
+import json
+import threading
+from bisect import bisect_right
+from types import MappingProxyType
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+def sort_key(user_rating, recipe_id):
+    """Catalog order: highest rating first, then by id; unrated recipes last."""
+    return (-user_rating if user_rating is not None else float('inf'), recipe_id)
+
+
+class CatalogSnapshot:
+    """
+    Immutable view of the catalog at one generation, sorted by sort_key.
+    The recipe dicts are shared between requests: copy before modifying.
+    """
+
+    __slots__ = ('generation', 'recipes', 'by_id', '_keys')
+
+    def __init__(self, generation, recipes):
+        self.generation = generation
+        self.recipes = tuple(sorted(recipes, key=lambda r: sort_key(r['user_rating'], r['id'])))
+        self.by_id = MappingProxyType({recipe['id']: recipe for recipe in self.recipes})
+        self._keys = [sort_key(r['user_rating'], r['id']) for r in self.recipes]
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def page(self, limit, after=None):
+        """
+        Keyset page of recipes following the (user_rating, id) position `after`.
+        The sorted key list acts as the index: each page is a bisect seek.
+
+        Returns:
+            (recipes, last) where last is the (user_rating, id) to continue
+            from, or None when this is the final page
+        """
+        start = bisect_right(self._keys, sort_key(*after)) if after else 0
+        recipes = self.recipes[start:start + limit]
+        if start + limit >= len(self.recipes) or not recipes:
+            return recipes, None
+        last = recipes[-1]
+        return recipes, (last['user_rating'], last['id'])
+
+
+def encode_cursor(position):
+    """Opaque pagination cursor for a (user_rating, id) position."""
+    return base64.urlsafe_b64encode(json.dumps(list(position)).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor; raises ValueError for malformed cursors."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        user_rating, recipe_id = json.loads(base64.urlsafe_b64decode(padded))
+        if user_rating is not None:
+            user_rating = float(user_rating)
+        return user_rating, int(recipe_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
+
+
+def get_generation(conn, name='catalog'):
+    """Read a data-generation counter."""
+    row = conn.execute('SELECT value FROM generations WHERE name = ?', (name,)).fetchone()
+    return row[0] if row else 0
+
+
+def _build_snapshot(conn):
+    """Load the catalog from the database."""
+    # Read the generation first: the rows are then at least that new, so a
+    # concurrent write can only cause one extra rebuild, never a stale cache.
+    generation = get_generation(conn)
+    rows = conn.execute('''
+        SELECT r.*, n.calories, n.protein, n.carbohydrate, n.fat, n.fiber
+        FROM recipes r
+        LEFT JOIN nutrition n ON r.id = n.recipe_id
+    ''').fetchall()
+    recipes = [dict(row) for row in rows]
+    # Not tracked by the generation (draws would invalidate every cache), so not served
+    for recipe in recipes:
+        recipe.pop('times_drawn', None)
+    return CatalogSnapshot(generation, recipes)
+
+
+def get_catalog(conn):
+    """Get this worker's catalog snapshot, rebuilding it if the generation moved."""
+    global _snapshot
+
+    generation = get_generation(conn)
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.generation >= generation:
+        return snapshot
+
+    with _lock:
+        snapshot = _snapshot
+        if snapshot is None or snapshot.generation < generation:
+            snapshot = _build_snapshot(conn)
+            _snapshot = snapshot
+    return snapshot
+
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Response compression.
+- JSON responses above a size threshold are compressed with brotli (when
+  installed) or gzip, negotiated from Accept-Encoding.
+- Static pages are rendered once and kept in precompressed variants,
+  served with a content-hash ETag. Pages at fixed URLs are revalidated on
+  every load (a cheap 304 while unchanged), so a deploy is picked up at
+  once; only content-hashed URLs may be cached for long.
+"""
+
+import gzip
+import hashlib
+import os
+
+from flask import make_response, request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Smallest response body (bytes) worth compressing
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+# Levels for on-the-fly compression; precompressed pages always use the maximum
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 5))
+
+COMPRESSIBLE_MIMETYPES = {'application/json'}
+
+
+def supported_encodings():
+    """Encodings this process can produce, most preferred first."""
+    return ['br', 'gzip'] if brotli is not None else ['gzip']
+
+
+def choose_encoding(accept_encodings, available=None):
+    """Best encoding the client accepts, or None for identity."""
+    for encoding in available or supported_encodings():
+        if accept_encodings[encoding] > 0:
+            return encoding
+    return None
+
+
+def compress(data, encoding, maximum=False):
+    """Compress bytes with the given content encoding."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=11 if maximum else BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=9 if maximum else GZIP_LEVEL, mtime=0)
+
+
+def encoded_etag(etag, encoding):
+    """Representation-specific strong ETag for a compressed body."""
+    return f'{etag}-{encoding}' if encoding else etag
+
+
+def etag_variants(etag):
+    """Every ETag a client may hold for one resource version."""
+    return [etag] + [encoded_etag(etag, encoding) for encoding in supported_encodings()]
+
+
+def init_app(app):
+    """Compress eligible responses after each request."""
+    @app.after_request
+    def _compress_response(response):
+        if (response.status_code != 200
+                or response.direct_passthrough
+                or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        response.vary.add('Accept-Encoding')
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding is None:
+            return response
+
+        response.set_data(compress(data, encoding))
+        response.headers['Content-Encoding'] = encoding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(encoded_etag(etag, encoding))
+        return response
+
+
+class PrecompressedPage:
+    """
+    A page rendered once and stored as identity, gzip and brotli variants.
+    cache_control defaults to revalidation; pass a long max-age (e.g.
+    'public, max-age=31536000, immutable') only for fingerprinted URLs.
+    """
+
+    def __init__(self, body, mimetype='text/html', cache_control='public, no-cache'):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.mimetype = mimetype
+        self.cache_control = cache_control
+        self.etag = hashlib.sha256(body).hexdigest()[:20]
+        self.variants = {None: body}
+        for encoding in supported_encodings():
+            self.variants[encoding] = compress(body, encoding, maximum=True)
+
+    def response(self):
+        """Serve the best variant for the current request."""
+        encoding = choose_encoding(request.accept_encodings, [e for e in self.variants if e])
+        etag = encoded_etag(self.etag, encoding)
+
+        if any(candidate in request.if_none_match for candidate in etag_variants(self.etag)):
+            response = make_response('', 304)
+        else:
+            response = make_response(self.variants[encoding])
+            response.mimetype = self.mimetype
+            if encoding:
+                response.headers['Content-Encoding'] = encoding
+
+        response.set_etag(etag)
+        response.vary.add('Accept-Encoding')
+        response.headers['Cache-Control'] = self.cache_control
+        return response
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Write-behind buffer for counter columns.
+Increments are collected in memory per worker and written in one
+executemany transaction on a timer, when the buffer fills up, and at exit.
+A crashed worker loses at most max_pending increments. While the database
+is failing, full-buffer flushes back off and increments beyond max_pending
+are dropped (and counted) rather than held without bound.
+"""
+
+import atexit
+import os
+import threading
+import time
+from collections import Counter
+
+import db
+
+# Seconds between background flushes
+TIMES_DRAWN_FLUSH_SECONDS = float(os.getenv('TIMES_DRAWN_FLUSH_SECONDS', 5))
+# Most increments held in memory (and so lost if the worker crashes)
+TIMES_DRAWN_MAX_PENDING = int(os.getenv('TIMES_DRAWN_MAX_PENDING', 50))
+
+
+class CounterBuffer:
+    """Aggregate increments per key and flush them with a single UPDATE statement."""
+
+    def __init__(self, update_sql, flush_seconds, max_pending):
+        self.update_sql = update_sql
+        self.flush_seconds = flush_seconds
+        self.max_pending = max(1, max_pending)
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._pending = Counter()
+        self._pending_total = 0
+        self._flusher_pid = None
+        # No synchronous flush before this time (monotonic) after a failure
+        self._retry_at = 0.0
+        self.dropped = 0
+
+    @property
+    def pending(self):
+        """Number of increments not yet written."""
+        return self._pending_total
+
+    def add(self, key, amount=1):
+        """
+        Record an increment; flushes synchronously once the buffer is full.
+        After a failed flush, a full buffer drops new increments instead of
+        retrying inside the request; the background timer keeps retrying.
+        """
+        self._ensure_flusher()
+        with self._lock:
+            backing_off = time.monotonic() < self._retry_at
+            if backing_off and self._pending_total >= self.max_pending:
+                self.dropped += amount
+                return
+            self._pending[key] += amount
+            self._pending_total += amount
+            full = not backing_off and self._pending_total >= self.max_pending
+        if full:
+            self.flush()
+
+    def flush(self):
+        """Write all pending increments in one transaction."""
+        with self._flush_lock:
+            with self._lock:
+                items = self._pending
+                self._pending = Counter()
+                self._pending_total = 0
+            if not items:
+                return 0
+
+            conn = db.get_connection()
+            try:
+                conn.executemany(self.update_sql, [(amount, key) for key, amount in items.items()])
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                # Keep the increments for the next attempt, up to max_pending
+                with self._lock:
+                    room = max(0, self.max_pending - self._pending_total)
+                    lost = 0
+                    for key, amount in items.items():
+                        kept = min(amount, room)
+                        if kept:
+                            self._pending[key] += kept
+                            self._pending_total += kept
+                            room -= kept
+                        lost += amount - kept
+                    self.dropped += lost
+                    self._retry_at = time.monotonic() + self.flush_seconds
+                print(f"⚠️ Failed to flush counters ({lost} increments dropped): {e}")
+                return 0
+            self._retry_at = 0.0
+            return len(items)
+
+    def _ensure_flusher(self):
+        """Start the background flush thread once per process (threads do not survive fork)."""
+        if self._flusher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid():
+                return
+            self._flusher_pid = os.getpid()
+            # Increments inherited from the parent are the parent's to flush
+            self._pending = Counter()
+            self._pending_total = 0
+        thread = threading.Thread(target=self._run, name='counter-flusher', daemon=True)
+        thread.start()
+
+    def _run(self):
+        stop = threading.Event()
+        while not stop.wait(self.flush_seconds):
+            self.flush()
+
+
+times_drawn = CounterBuffer(
+    'UPDATE recipes SET times_drawn = times_drawn + ? WHERE id = ?',
+    TIMES_DRAWN_FLUSH_SECONDS,
+    TIMES_DRAWN_MAX_PENDING,
+)
+
+atexit.register(times_drawn.flush)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Shared SQLite connection manager.
+Keeps one long-lived connection per worker thread, configured for
+concurrent readers and writers (WAL, busy timeout, statement cache).
+"""
+
+import os
+import sqlite3
+import threading
+
+DB_PATH = os.getenv('DB_PATH', os.path.join(os.path.dirname(__file__), 'breakfast.db'))
+
+# Milliseconds a writer waits for the lock before raising "database is locked"
+BUSY_TIMEOUT_MS = int(os.getenv('SQLITE_BUSY_TIMEOUT_MS', 5000))
+# Number of prepared statements kept per connection
+STATEMENT_CACHE_SIZE = int(os.getenv('SQLITE_STATEMENT_CACHE_SIZE', 256))
+
+_local = threading.local()
+
+
+def connect(db_path=None):
+    """Open a new configured connection."""
+    conn = sqlite3.connect(
+        db_path or DB_PATH,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        cached_statements=STATEMENT_CACHE_SIZE,
+    )
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute(f'PRAGMA busy_timeout={BUSY_TIMEOUT_MS}')
+    return conn
+
+
+def get_connection():
+    """
+    Get this thread's long-lived connection, opening it on first use.
+    Connections inherited across a fork are never reused by the child.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None or _local.pid != os.getpid():
+        conn = connect()
+        _local.conn = conn
+        _local.pid = os.getpid()
+    return conn
+
+
+def release_connection():
+    """Return this thread's connection to a clean state without closing it."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.pid == os.getpid() and conn.in_transaction:
+        conn.rollback()
+
+
+def close_connection():
+    """Close this thread's connection (e.g. on worker shutdown)."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None and _local.pid == os.getpid():
+        conn.close()
+    _local.conn = None
+
+
+def init_app(app):
+    """Release the thread's connection when each Flask app context ends."""
+    @app.teardown_appcontext
+    def _release_db(exception=None):
+        release_connection()
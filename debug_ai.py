@@ -11,8 +11,8 @@ try:
     import ai_assistant
     print("Import successful.")
     
-    print("\nCalling get_perplexity_client()...")
-    client = ai_assistant.get_perplexity_client()
+    print("\nCalling get_async_perplexity_client()...")
+    client = ai_assistant.get_async_perplexity_client()
     print(f"Client: {client}")
     
     if client:
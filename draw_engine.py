@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+"""
+Weighted draw engine.
+Keeps a Fenwick (binary indexed) tree over recipe weights so a draw and a
+single rating change both cost O(log n) instead of rebuilding the weight
+list on every request.
+"""
+
+import random
+import threading
+
+from catalog import get_catalog, get_generation
+
+_lock = threading.Lock()
+_sampler = None
+
+
+def rating_weight(rating):
+    """Draw weight for a rating (rating^2 for stronger effect)."""
+    return (rating or 3.0) ** 2
+
+
+class WeightedSampler:
+    """Sample keys with probability proportional to their weights."""
+
+    def __init__(self, keys, weights, generation=0):
+        self.generation = generation
+        self._keys = list(keys)
+        self._positions = {key: i for i, key in enumerate(self._keys)}
+        self._weights = [float(w) for w in weights]
+
+        # Build the tree in O(n): push each node's sum to its parent
+        n = len(self._keys)
+        self._tree = [0.0] + self._weights
+        for i in range(1, n + 1):
+            parent = i + (i & -i)
+            if parent <= n:
+                self._tree[parent] += self._tree[i]
+
+        self._top_bit = 1
+        while self._top_bit * 2 <= n:
+            self._top_bit *= 2
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    @property
+    def total(self):
+        """Sum of all weights."""
+        total, i = 0.0, len(self._keys)
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    def weight(self, key):
+        """Current weight of key."""
+        return self._weights[self._positions[key]]
+
+    def update(self, key, weight):
+        """Change the weight of an existing key in O(log n)."""
+        position = self._positions[key]
+        delta = float(weight) - self._weights[position]
+        self._weights[position] = float(weight)
+        i, n = position + 1, len(self._keys)
+        while i <= n:
+            self._tree[i] += delta
+            i += i & -i
+
+    def _find(self, target):
+        """Index of the first key whose cumulative weight exceeds target."""
+        position, step = 0, self._top_bit
+        while step:
+            nxt = position + step
+            if nxt <= len(self._keys) and self._tree[nxt] <= target:
+                target -= self._tree[nxt]
+                position = nxt
+            step //= 2
+        return min(position, len(self._keys) - 1)
+
+    def sample(self, rng=random):
+        """Draw one key."""
+        if not self._keys:
+            raise IndexError('sample from an empty sampler')
+        return self._keys[self._find(rng.random() * self.total)]
+
+    def sample_distinct(self, k, rng=random, exclude=()):
+        """
+        Draw up to k distinct keys without replacement, skipping excluded keys.
+        Chosen and excluded keys are zeroed while drawing and restored after.
+        """
+        removed = {}
+        try:
+            for key in exclude:
+                if key in self._positions and key not in removed:
+                    removed[key] = self.weight(key)
+                    self.update(key, 0.0)
+
+            chosen = []
+            # Small epsilon guards against float residue after zeroing weights
+            while len(chosen) < k and self.total > 1e-9:
+                key = self.sample(rng)
+                chosen.append(key)
+                removed[key] = self.weight(key)
+                self.update(key, 0.0)
+            return chosen
+        finally:
+            for key, weight in removed.items():
+                self.update(key, weight)
+
+
+def get_sampler(conn):
+    """Get this worker's sampler, rebuilding it from the catalog if it is stale."""
+    global _sampler
+
+    generation = get_generation(conn)
+    sampler = _sampler
+    if sampler is not None and sampler.generation >= generation:
+        return sampler
+
+    with _lock:
+        sampler = _sampler
+        if sampler is None or sampler.generation < generation:
+            catalog = get_catalog(conn)
+            sampler = WeightedSampler(
+                [r['id'] for r in catalog.recipes],
+                [rating_weight(r['user_rating']) for r in catalog.recipes],
+                catalog.generation,
+            )
+            _sampler = sampler
+    return sampler
+
+
+def draw(conn, rng=random):
+    """Draw one recipe id, or None if the catalog is empty."""
+    sampler = get_sampler(conn)
+    with _lock:
+        if not len(sampler):
+            return None
+        return sampler.sample(rng)
+
+
+def draw_many(conn, k, exclude=(), rng=random):
+    """Draw up to k distinct recipe ids, never returning ids in exclude."""
+    sampler = get_sampler(conn)
+    with _lock:
+        return sampler.sample_distinct(k, rng, exclude)
+
+
+def apply_rating(recipe_id, rating, generation):
+    """
+    Apply a rating change made by this worker in O(log n).
+    generation is the catalog generation right after that write; if any
+    other write happened in between, the sampler is left to rebuild.
+    """
+    with _lock:
+        sampler = _sampler
+        if sampler is None or recipe_id not in sampler or sampler.generation != generation - 1:
+            return False
+        sampler.update(recipe_id, rating_weight(rating))
+        sampler.generation = generation
+        return True
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Conditional GET support.
+ETags are derived from the data-generation counters that triggers keep in
+the generations table, so an unchanged resource is answered with 304
+before the view runs any of its queries.
+"""
+
+import hashlib
+from functools import wraps
+
+from flask import make_response, request
+
+import db
+from compression import etag_variants
+
+
+def get_generations(conn):
+    """All data-generation counters, in one query."""
+    return dict(conn.execute('SELECT name, value FROM generations').fetchall())
+
+
+def make_etag(*parts):
+    """Strong ETag value for the given parts."""
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()[:20]
+
+
+def conditional(*generation_names, key=None, cache_control='no-cache'):
+    """
+    Serve a GET view with ETag / If-None-Match support.
+
+    Args:
+        generation_names: Generation counters the response depends on
+        key: Optional callable returning extra ETag input (e.g. a date)
+        cache_control: Cache-Control header for 200 and 304 responses
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            generations = get_generations(db.get_connection())
+            etag = make_etag(
+                request.path,
+                request.query_string,
+                [generations.get(name, 0) for name in generation_names],
+                key() if key else None,
+            )
+
+            # A compressed response carries an encoding-specific variant of the ETag
+            if any(candidate in request.if_none_match for candidate in etag_variants(etag)):
+                response = make_response('', 304)
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
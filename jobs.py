@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Background jobs for slow AI work.
+Recipe generation, photo extraction and AI pre-warming are queued in the
+jobs table and run by a small pool of threads in each worker process, so
+HTTP requests return at once (202) instead of holding a server thread for
+the whole LLM call. Idle workers poll with plain reads; a job is claimed
+under a write lock, so exactly one worker runs each. A claim is a lease,
+renewed while the job runs, and jobs whose worker died (restart, crash)
+are picked up again once their lease expires.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+
+import ai_runtime
+import db
+from recipe_loader import load_recipe
+
+# Job threads per worker process
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 2))
+# Seconds between queue checks when idle
+JOB_POLL_SECONDS = float(os.getenv('JOB_POLL_SECONDS', 1))
+# Time budget (seconds) for all LLM calls of one job
+JOB_DEADLINE_SECONDS = float(os.getenv('JOB_DEADLINE_SECONDS', 180))
+# Seconds a claim lasts unless renewed; running jobs renew it every third of this
+JOB_LEASE_SECONDS = float(os.getenv('JOB_LEASE_SECONDS', 300))
+# Attempts before a job whose worker keeps dying is marked failed
+JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 3))
+# Seconds finished jobs are kept for status polling
+JOB_RETENTION_SECONDS = float(os.getenv('JOB_RETENTION_SECONDS', 24 * 3600))
+
+FINISHED = ('done', 'failed')
+
+_lock = threading.Lock()
+_workers_pid = None
+_wakeup = threading.Event()
+_handlers = {}
+
+
+def handler(kind):
+    """Register the function that runs jobs of a kind: fn(payload, blob) -> result dict."""
+    def decorator(fn):
+        _handlers[kind] = fn
+        return fn
+    return decorator
+
+
+def enqueue(kind, payload, blob=None, start_workers=True):
+    """
+    Queue a job and return its id. start_workers=False only queues it, for
+    processes that must not run jobs themselves (the gunicorn master).
+    """
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    conn = db.get_connection()
+    try:
+        conn.execute('''
+            INSERT INTO jobs (id, kind, payload, blob, status, attempts, created_at, updated_at)
+            VALUES (?, ?, ?, ?, 'queued', 0, ?, ?)
+        ''', (job_id, kind, json.dumps(payload, ensure_ascii=False), blob, now, now))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    if start_workers:
+        ensure_workers()
+        _wakeup.set()
+    return job_id
+
+
+def get_job(job_id):
+    """Public view of a job, or None if it does not exist (or has been cleaned up)."""
+    row = db.get_connection().execute('''
+        SELECT id, kind, status, result, error, attempts, created_at, updated_at
+        FROM jobs WHERE id = ?
+    ''', (job_id,)).fetchone()
+    if row is None:
+        return None
+    job = dict(row)
+    job['result'] = json.loads(job['result']) if job['result'] else None
+    return job
+
+
+def _runnable(conn, now):
+    """Id of the oldest queued job, or running job whose lease expired, or None."""
+    row = conn.execute('''
+        SELECT id FROM jobs
+        WHERE status = 'queued' OR (status = 'running' AND lease_expires < ?)
+        ORDER BY created_at LIMIT 1
+    ''', (now,)).fetchone()
+    return row['id'] if row else None
+
+
+def claim(owner):
+    """
+    Atomically take the oldest runnable job: queued, or running under an
+    expired lease. Returns the job row, or None when the queue is empty.
+    Idle polls only read; the write lock is taken just to claim a job.
+    """
+    conn = db.get_connection()
+    now = time.time()
+    if _runnable(conn, now) is None:
+        return None
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Jobs that keep killing their worker are given up on
+        conn.execute('''
+            UPDATE jobs SET status = 'failed', error = 'Job abandoned after repeated worker failures',
+                blob = NULL, updated_at = ?
+            WHERE status = 'running' AND lease_expires < ? AND attempts >= ?
+        ''', (now, now, JOB_MAX_ATTEMPTS))
+
+        # Another worker may have claimed it between the read and the lock
+        job_id = _runnable(conn, now)
+        row = None
+        if job_id is not None:
+            conn.execute('''
+                UPDATE jobs SET status = 'running', owner = ?, lease_expires = ?,
+                    attempts = attempts + 1, updated_at = ?
+                WHERE id = ?
+            ''', (owner, now + JOB_LEASE_SECONDS, now, job_id))
+            row = conn.execute('SELECT id, kind, payload, blob FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        conn.commit()
+        return row
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def finish(job_id, owner, status, result=None, error=None):
+    """Store a job's outcome, unless another worker has since taken it over."""
+    conn = db.get_connection()
+    now = time.time()
+    try:
+        conn.execute('''
+            UPDATE jobs SET status = ?, result = ?, error = ?, blob = NULL, updated_at = ?
+            WHERE id = ? AND owner = ?
+        ''', (status, json.dumps(result, ensure_ascii=False) if result is not None else None,
+              error, now, job_id, owner))
+        conn.execute(
+            'DELETE FROM jobs WHERE status IN (?, ?) AND updated_at < ?',
+            FINISHED + (now - JOB_RETENTION_SECONDS,)
+        )
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def renew(job_id, owner):
+    """Extend a running job's lease, unless another worker has since taken it over."""
+    conn = db.get_connection()
+    now = time.time()
+    try:
+        conn.execute('''
+            UPDATE jobs SET lease_expires = ?, updated_at = ?
+            WHERE id = ? AND owner = ? AND status = 'running'
+        ''', (now + JOB_LEASE_SECONDS, now, job_id, owner))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _keep_leased(job_id, owner, stop):
+    """Renew a job's lease until it finishes; long jobs (bulk generation) outlive one lease."""
+    try:
+        while not stop.wait(JOB_LEASE_SECONDS / 3):
+            try:
+                renew(job_id, owner)
+            except Exception as e:
+                print(f"⚠️ Failed to renew lease of job {job_id}: {e}")
+    finally:
+        db.release_connection()
+
+
+def run_one(owner):
+    """Claim and run one job. Returns False when there was nothing to do."""
+    job = claim(owner)
+    if job is None:
+        return False
+
+    stop = threading.Event()
+    threading.Thread(target=_keep_leased, args=(job['id'], owner, stop), daemon=True).start()
+    try:
+        with ai_runtime.deadline(JOB_DEADLINE_SECONDS):
+            result = _handlers[job['kind']](json.loads(job['payload']), job['blob'])
+        if result.get('success'):
+            finish(job['id'], owner, 'done', result)
+        else:
+            finish(job['id'], owner, 'failed', result, result.get('error'))
+    except Exception as e:
+        print(f"⚠️ Job {job['id']} ({job['kind']}) failed: {e}")
+        finish(job['id'], owner, 'failed', None, str(e))
+    finally:
+        stop.set()
+        db.release_connection()
+    return True
+
+
+def _worker_loop(owner):
+    while True:
+        try:
+            if run_one(owner):
+                continue
+        except Exception as e:
+            print(f"⚠️ Job worker error: {e}")
+        _wakeup.wait(JOB_POLL_SECONDS)
+        _wakeup.clear()
+
+
+def ensure_workers():
+    """Start this process's job threads once (threads do not survive fork)."""
+    global _workers_pid
+    if _workers_pid == os.getpid():
+        return
+    with _lock:
+        if _workers_pid == os.getpid():
+            return
+        _workers_pid = os.getpid()
+        for i in range(JOB_WORKERS):
+            owner = f'{os.getpid()}:{i}:{uuid.uuid4().hex[:8]}'
+            thread = threading.Thread(target=_worker_loop, args=(owner,), name=f'job-worker-{i}', daemon=True)
+            thread.start()
+
+
+# ======================
+# Job handlers
+# ======================
+
+def _recipe_result(conn, recipe_id, message):
+    return {'success': True, 'message': message, 'recipe': load_recipe(conn, recipe_id)}
+
+
+@handler('generate_recipe')
+def run_generate_recipe(payload, blob=None):
+    """Generate a recipe from a dish name and add it to the catalog."""
+    from ai_assistant import generate_recipe_from_name, insert_recipe_to_db
+
+    recipe_data = generate_recipe_from_name(payload['dish_name'])
+    if not recipe_data.get('success', False):
+        return recipe_data
+
+    insert_result = insert_recipe_to_db(recipe_data)
+    if not insert_result.get('success', False):
+        return insert_result
+    return _recipe_result(db.get_connection(), insert_result['recipe_id'], insert_result['message'])
+
+
+@handler('extract_recipe')
+def run_extract_recipe(payload, blob):
+    """Extract a recipe from an uploaded photo and add it to the catalog."""
+    from ai_assistant import extract_recipe_from_upload, insert_recipe_to_db
+
+    recipe_data = extract_recipe_from_upload(blob)
+    if not recipe_data.get('success', False):
+        return recipe_data
+
+    conn = db.get_connection()
+    # The same photo again: return the recipe it created instead of a duplicate
+    if recipe_data.get('cached'):
+        name = recipe_data.get('recipe_name', '未命名')
+        existing = conn.execute(
+            'SELECT id FROM recipes WHERE recipe_name = ? ORDER BY id DESC LIMIT 1', (name,)
+        ).fetchone()
+        if existing:
+            return _recipe_result(conn, existing['id'], f"✅ 食谱已存在: {name}")
+
+    insert_result = insert_recipe_to_db(recipe_data)
+    if not insert_result.get('success', False):
+        return insert_result
+    return _recipe_result(conn, insert_result['recipe_id'], insert_result['message'])
+
+
+@handler('generate_recipes')
+def run_generate_recipes(payload, blob=None):
+    """Generate recipes for a list of dish names and add them to the catalog."""
+    import bulk_generate
+    return bulk_generate.generate_recipes(payload['dish_names'])
+
+
+@handler('prewarm')
+def run_prewarm(payload, blob=None):
+    """Generate (or refresh from cache) all AI content of a recipe."""
+    import prewarm
+    warmed = prewarm.prewarm_recipe(payload['recipe_id'])
+    print(f"🔥 Pre-warmed {warmed} AI answers for recipe {payload['recipe_id']}")
+    return {'success': True, 'warmed': warmed}
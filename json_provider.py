@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Flask JSON provider with an optional fast serializer.
+Uses orjson when it is installed and falls back to the stdlib json module
+otherwise. Both paths write UTF-8 directly (no \\uXXXX escaping of Chinese
+text) and can serialize sqlite3.Row objects without a dict() pass first.
+"""
+
+import json
+import sqlite3
+from types import MappingProxyType
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(o):
+    """Serialize types the encoders do not know natively."""
+    if isinstance(o, sqlite3.Row):
+        return dict(zip(o.keys(), o))
+    if isinstance(o, MappingProxyType):
+        return dict(o)
+    return DefaultJSONProvider.default(o)
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """JSON provider that prefers orjson and understands sqlite3.Row."""
+
+    ensure_ascii = False
+    sort_keys = False
+    default = staticmethod(_default)
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, **kwargs).decode('utf-8')
+
+    def dumps_bytes(self, obj, **kwargs):
+        """Serialize obj to UTF-8 bytes."""
+        if orjson is not None and not kwargs:
+            option = orjson.OPT_NON_STR_KEYS
+            if self.sort_keys:
+                option |= orjson.OPT_SORT_KEYS
+            try:
+                return orjson.dumps(obj, default=_default, option=option)
+            except TypeError:
+                # e.g. integers beyond 64 bits: let the stdlib handle it
+                pass
+
+        kwargs.setdefault('default', self.default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs).encode('utf-8')
+
+    def response(self, *args, **kwargs):
+        if self._app.debug:
+            # Keep Flask's pretty-printed output while debugging
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype=self.mimetype)
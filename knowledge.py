@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Offline cooking knowledge base.
+Keywords, synonyms and answers live in knowledge_base.json; at import the
+keywords are compiled into an Aho-Corasick automaton, so every keyword in a
+question is found in one pass over the text, however many there are. Serves
+the fallback answers and ingredient tips that need no network, and answers
+short generic questions before an LLM is asked at all. Most answers depend
+on the dish ("煮多久?" on a 小米粥 page is not about eggs), so with a recipe
+in context only entries marked "recipe_independent" are used that way.
+"""
+
+import json
+import os
+from collections import deque
+
+KNOWLEDGE_BASE_PATH = os.getenv(
+    'KNOWLEDGE_BASE_PATH', os.path.join(os.path.dirname(__file__), 'knowledge_base.json')
+)
+# Share of a question's characters that keywords must cover for it to be
+# answered locally instead of by an LLM (0 answers any match, 1 only exact ones)
+KNOWLEDGE_FIRST_TIER_COVERAGE = float(os.getenv('KNOWLEDGE_FIRST_TIER_COVERAGE', 0.9))
+
+_IGNORED = set(' \t\n?？!！。，,.、~～吗呢呀啊吧')
+
+
+class AhoCorasick:
+    """Multi-pattern matcher: finds all occurrences of all patterns in O(len(text) + matches)."""
+
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for index, pattern in enumerate(self.patterns):
+            state = 0
+            for char in pattern:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(index)
+
+        # Breadth-first: a state's fail link points to its longest proper suffix in the trie
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(char, 0)
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def finditer(self, text):
+        """Yield (start, pattern_index) for every match in text."""
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(char, 0)
+            for index in self._out[state]:
+                yield end - len(self.patterns[index]) + 1, index
+
+
+class KnowledgeBase:
+    """Compiled question answers and ingredient tips."""
+
+    def __init__(self, data):
+        self.answers = data.get('answers', [])
+        self.default_answer = data.get('default_answer', '')
+        self.ingredients = data.get('ingredients', [])
+
+        keywords, self._keyword_answer = [], []
+        for i, entry in enumerate(self.answers):
+            for keyword in entry['keywords']:
+                keywords.append(keyword.lower())
+                self._keyword_answer.append(i)
+        self._questions = AhoCorasick(keywords)
+
+        self._tips = {}
+        for entry in self.ingredients:
+            for name in [entry['name']] + entry.get('aliases', []):
+                self._tips[name.lower()] = entry['tips']
+
+    @classmethod
+    def load(cls, path=None):
+        with open(path or KNOWLEDGE_BASE_PATH, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def search(self, question, limit=3, recipe_independent=False):
+        """
+        Answers matching a question, best first, as (score, coverage, answer).
+        An answer scores the total length of its distinct keywords found, so
+        specific phrases outrank single characters; coverage is the share of
+        the question's characters covered by any keyword. recipe_independent
+        limits the search to answers that hold for every dish.
+        """
+        text = question.lower()
+        found = {}
+        covered = set()
+        for start, index in self._questions.finditer(text):
+            if recipe_independent and not self.answers[self._keyword_answer[index]].get('recipe_independent'):
+                continue
+            keyword = self._questions.patterns[index]
+            found.setdefault(self._keyword_answer[index], set()).add(keyword)
+            covered.update(range(start, start + len(keyword)))
+
+        meaningful = sum(1 for char in text if char not in _IGNORED) or 1
+        coverage = min(1.0, len(covered) / meaningful)
+        ranked = sorted(
+            ((sum(map(len, words)), i) for i, words in found.items()),
+            key=lambda item: (-item[0], item[1])
+        )
+        return [(score, coverage, self.answers[i]['answer']) for score, i in ranked[:limit]]
+
+    def answer(self, question):
+        """Best local answer to a question, or the default answer."""
+        results = self.search(question, limit=1)
+        return results[0][2] if results else self.default_answer
+
+    def first_tier_answer(self, question, has_recipe=True):
+        """
+        A local answer good enough to skip the LLM, or None. With a recipe
+        in context only answers that hold for every dish qualify.
+        """
+        results = self.search(question, limit=1, recipe_independent=has_recipe)
+        if results and results[0][1] >= KNOWLEDGE_FIRST_TIER_COVERAGE:
+            return results[0][2]
+        return None
+
+    def ingredient_tips(self, ingredient_name):
+        """Tips for an ingredient, looked up by name or alias, or None."""
+        return self._tips.get(ingredient_name.strip().lower())
+
+
+knowledge_base = KnowledgeBase.load()
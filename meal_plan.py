@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Multi-day meal planning.
+Draws one recipe per day with the weighted draw engine, avoiding repeats
+within a configurable window, and can confirm the whole plan at once.
+"""
+
+import os
+from datetime import datetime, timedelta
+
+import draw_engine
+
+# Days within which the same recipe is not planned twice
+PLAN_NO_REPEAT_DAYS = int(os.getenv('PLAN_NO_REPEAT_DAYS', 5))
+
+
+def _date_range(start_date, days):
+    """List of ISO date strings starting at start_date."""
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    return [(start + timedelta(days=i)).strftime('%Y-%m-%d') for i in range(days)]
+
+
+def build_plan(conn, start_date, days, window=PLAN_NO_REPEAT_DAYS):
+    """
+    Plan recipes for `days` days from start_date.
+    Days that already have a confirmed meal keep it; other days are drawn
+    so that no recipe repeats within `window` days, counting confirmed
+    meals just before and inside the plan.
+
+    Returns:
+        List of {'draw_date', 'recipe_id', 'already_confirmed'} in date order
+    """
+    dates = _date_range(start_date, days)
+    window = max(1, window)
+    lookback = _date_range(
+        (datetime.strptime(start_date, '%Y-%m-%d') - timedelta(days=window - 1)).strftime('%Y-%m-%d'),
+        window - 1 + days
+    )
+
+    placeholders = ', '.join('?' * len(lookback))
+    confirmed = dict(conn.execute(f'''
+        SELECT draw_date, recipe_id FROM draw_history
+        WHERE confirmed = 1 AND draw_date IN ({placeholders})
+    ''', lookback).fetchall())
+
+    # Recipe chosen for every day of the lookback + plan range
+    chosen = {day: confirmed.get(day) for day in lookback}
+    plan = []
+    for day in dates:
+        if chosen[day] is not None:
+            plan.append({'draw_date': day, 'recipe_id': chosen[day], 'already_confirmed': True})
+            continue
+
+        index = lookback.index(day)
+        neighbours = lookback[max(0, index - window + 1):index + window]
+        exclude = {chosen[d] for d in neighbours if chosen[d] is not None}
+
+        picked = draw_engine.draw_many(conn, 1, exclude=exclude)
+        if not picked:
+            # Catalog too small for the window: allow a repeat rather than skip the day
+            picked = draw_engine.draw_many(conn, 1)
+        if not picked:
+            break
+
+        chosen[day] = picked[0]
+        plan.append({'draw_date': day, 'recipe_id': picked[0], 'already_confirmed': False})
+
+    return plan
+
+
+def confirm_plan(conn, plan):
+    """
+    Confirm all newly drawn days of a plan in a single transaction.
+    Days another request confirmed in the meantime are updated in place
+    to the meal that was actually confirmed.
+
+    Returns:
+        Number of days confirmed
+    """
+    new_days = [entry for entry in plan if not entry['already_confirmed']]
+    if not new_days:
+        return 0
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Skip days another request confirmed since the plan was drawn
+        placeholders = ', '.join('?' * len(new_days))
+        taken = dict(conn.execute(f'''
+            SELECT draw_date, recipe_id FROM draw_history
+            WHERE confirmed = 1 AND draw_date IN ({placeholders})
+        ''', [entry['draw_date'] for entry in new_days]).fetchall())
+        for entry in new_days:
+            if entry['draw_date'] in taken:
+                entry['recipe_id'] = taken[entry['draw_date']]
+                entry['already_confirmed'] = True
+        new_days = [entry for entry in new_days if entry['draw_date'] not in taken]
+
+        conn.executemany('''
+            DELETE FROM draw_history WHERE draw_date = ? AND confirmed = 0
+        ''', [(entry['draw_date'],) for entry in new_days])
+        conn.executemany('''
+            INSERT INTO draw_history (recipe_id, draw_date, confirmed)
+            VALUES (?, ?, 1)
+        ''', [(entry['recipe_id'], entry['draw_date']) for entry in new_days])
+        conn.executemany('''
+            UPDATE recipes SET times_drawn = times_drawn + 1 WHERE id = ?
+        ''', [(entry['recipe_id'],) for entry in new_days])
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return len(new_days)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Versioned schema migrations.
+The schema version is tracked in PRAGMA user_version; each migration runs
+once, in order, inside the same write transaction that bumps the version.
+"""
+
+# (version, description, statements) - append only, never renumber
+MIGRATIONS = [
+    (1, 'Index ingredients by recipe', [
+        'CREATE INDEX IF NOT EXISTS idx_ingredients_recipe ON ingredients(recipe_id)',
+    ]),
+    (2, 'Index instructions by recipe and step', [
+        'CREATE INDEX IF NOT EXISTS idx_instructions_recipe_step ON instructions(recipe_id, step_number)',
+    ]),
+    (3, 'Index nutrition by recipe', [
+        'CREATE INDEX IF NOT EXISTS idx_nutrition_recipe ON nutrition(recipe_id)',
+    ]),
+    (4, 'Index draw history by date and confirmation', [
+        'CREATE INDEX IF NOT EXISTS idx_draw_history_date_confirmed ON draw_history(draw_date, confirmed)',
+    ]),
+    (5, 'Add key/value metadata table', [
+        'CREATE TABLE IF NOT EXISTS app_meta (key TEXT PRIMARY KEY, value TEXT)',
+    ]),
+    (6, 'Track catalog generation for per-worker caches', [
+        'CREATE TABLE IF NOT EXISTS generations (name TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)',
+        "INSERT OR IGNORE INTO generations (name, value) VALUES ('catalog', 0)",
+        '''CREATE TRIGGER IF NOT EXISTS trg_recipes_insert_catalog AFTER INSERT ON recipes
+           BEGIN UPDATE generations SET value = value + 1 WHERE name = 'catalog'; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_recipes_delete_catalog AFTER DELETE ON recipes
+           BEGIN UPDATE generations SET value = value + 1 WHERE name = 'catalog'; END''',
+        # times_drawn is deliberately left out: draws must not invalidate the catalog
+        '''CREATE TRIGGER IF NOT EXISTS trg_recipes_update_catalog
+           AFTER UPDATE OF recipe_name, recipe_name_en, category, difficulty, cooking_time,
+               source_article, source_author, source_link, thumbnail_url, publish_date,
+               likes_count, user_rating ON recipes
+           BEGIN UPDATE generations SET value = value + 1 WHERE name = 'catalog'; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_nutrition_insert_catalog AFTER INSERT ON nutrition
+           BEGIN UPDATE generations SET value = value + 1 WHERE name = 'catalog'; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_nutrition_update_catalog AFTER UPDATE ON nutrition
+           BEGIN UPDATE generations SET value = value + 1 WHERE name = 'catalog'; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_nutrition_delete_catalog AFTER DELETE ON nutrition
+           BEGIN UPDATE generations SET value = value + 1 WHERE name = 'catalog'; END''',
+    ]),
+    (7, 'Track recipe detail and draw history generations for ETags', [
+        "INSERT OR IGNORE INTO generations (name, value) VALUES ('history', 0)",
+        '''CREATE TRIGGER IF NOT EXISTS trg_ingredients_insert_catalog AFTER INSERT ON ingredients
+           BEGIN UPDATE generations SET value = value + 1 WHERE name = 'catalog'; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_ingredients_update_catalog AFTER UPDATE ON ingredients
+           BEGIN UPDATE generations SET value = value + 1 WHERE name = 'catalog'; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_ingredients_delete_catalog AFTER DELETE ON ingredients
+           BEGIN UPDATE generations SET value = value + 1 WHERE name = 'catalog'; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_instructions_insert_catalog AFTER INSERT ON instructions
+           BEGIN UPDATE generations SET value = value + 1 WHERE name = 'catalog'; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_instructions_update_catalog AFTER UPDATE ON instructions
+           BEGIN UPDATE generations SET value = value + 1 WHERE name = 'catalog'; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_instructions_delete_catalog AFTER DELETE ON instructions
+           BEGIN UPDATE generations SET value = value + 1 WHERE name = 'catalog'; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_draw_history_insert AFTER INSERT ON draw_history
+           BEGIN UPDATE generations SET value = value + 1 WHERE name = 'history'; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_draw_history_update AFTER UPDATE ON draw_history
+           BEGIN UPDATE generations SET value = value + 1 WHERE name = 'history'; END''',
+        '''CREATE TRIGGER IF NOT EXISTS trg_draw_history_delete AFTER DELETE ON draw_history
+           BEGIN UPDATE generations SET value = value + 1 WHERE name = 'history'; END''',
+    ]),
+    (8, 'Add persistent AI response cache', [
+        '''CREATE TABLE IF NOT EXISTS ai_cache (
+               key TEXT PRIMARY KEY,
+               kind TEXT NOT NULL,
+               value TEXT NOT NULL,
+               created_at REAL NOT NULL,
+               expires_at REAL NOT NULL,
+               last_used REAL NOT NULL
+           )''',
+        'CREATE INDEX IF NOT EXISTS idx_ai_cache_last_used ON ai_cache(last_used)',
+        'CREATE INDEX IF NOT EXISTS idx_ai_cache_expires ON ai_cache(expires_at)',
+        'CREATE TABLE IF NOT EXISTS ai_cache_stats (name TEXT PRIMARY KEY, value INTEGER NOT NULL DEFAULT 0)',
+    ]),
+    (9, 'Add lease table for coalescing identical AI calls across workers', [
+        '''CREATE TABLE IF NOT EXISTS ai_flights (
+               key TEXT PRIMARY KEY,
+               owner TEXT NOT NULL,
+               lease_expires REAL NOT NULL,
+               result TEXT,
+               result_expires REAL
+           )''',
+    ]),
+    (10, 'Add semantic answer cache for cooking help', [
+        '''CREATE TABLE IF NOT EXISTS semantic_answers (
+               id INTEGER PRIMARY KEY AUTOINCREMENT,
+               recipe_key TEXT NOT NULL,
+               question TEXT NOT NULL,
+               vector BLOB NOT NULL,
+               answer TEXT NOT NULL,
+               created_at REAL NOT NULL
+           )''',
+        'CREATE INDEX IF NOT EXISTS idx_semantic_answers_recipe ON semantic_answers(recipe_key, id)',
+    ]),
+    (11, 'Add background job queue', [
+        '''CREATE TABLE IF NOT EXISTS jobs (
+               id TEXT PRIMARY KEY,
+               kind TEXT NOT NULL,
+               payload TEXT NOT NULL,
+               blob BLOB,
+               status TEXT NOT NULL,
+               result TEXT,
+               error TEXT,
+               attempts INTEGER NOT NULL DEFAULT 0,
+               owner TEXT,
+               lease_expires REAL,
+               created_at REAL NOT NULL,
+               updated_at REAL NOT NULL
+           )''',
+        'CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs(status, created_at)',
+    ]),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    """Read the schema version stored in the database."""
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+def migrate(conn):
+    """
+    Apply all pending migrations.
+    Safe to call from several processes at startup: the version is re-read
+    under the write lock, so each migration is applied exactly once.
+
+    Returns:
+        The schema version after migrating
+    """
+    if get_schema_version(conn) >= LATEST_VERSION:
+        return LATEST_VERSION
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        current = get_schema_version(conn)
+        for version, description, statements in MIGRATIONS:
+            if version <= current:
+                continue
+            for statement in statements:
+                conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {version}')
+            print(f"🔧 Applied migration {version}: {description}")
+            current = version
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+
+    return current
@@ -6,16 +6,15 @@ Sends daily notifications via Email and/or WhatsApp.
 
 import os
 import smtplib
-import sqlite3
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+import db
+from recipe_loader import load_confirmed_recipe
 
 load_dotenv()
 
-DB_PATH = os.path.join(os.path.dirname(__file__), 'breakfast.db')
-
 
 def get_tomorrow_date():
     """Get tomorrow's date string."""
@@ -24,36 +23,8 @@ def get_tomorrow_date():
 
 def get_tomorrow_meal():
     """Get the confirmed meal for tomorrow from database."""
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
-    
-    tomorrow = get_tomorrow_date()
-    
-    cursor.execute('''
-        SELECT r.*, n.calories, n.protein, n.carbohydrate, n.fat, n.fiber
-        FROM draw_history dh
-        JOIN recipes r ON dh.recipe_id = r.id
-        LEFT JOIN nutrition n ON r.id = n.recipe_id
-        WHERE dh.draw_date = ? AND dh.confirmed = 1
-    ''', (tomorrow,))
-    
-    result = cursor.fetchone()
-    if not result:
-        conn.close()
-        return None
-    
-    meal = dict(result)
-    
-    # Get ingredients
-    cursor.execute('''
-        SELECT ingredient_name, quantity, unit, notes
-        FROM ingredients WHERE recipe_id = ?
-    ''', (meal['id'],))
-    meal['ingredients'] = [dict(row) for row in cursor.fetchall()]
-    
-    conn.close()
-    return meal
+    conn = db.get_connection()
+    return load_confirmed_recipe(conn, get_tomorrow_date())
 
 
 def format_meal_message(meal):
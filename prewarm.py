@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Pre-warm AI content for confirmed meals.
+Generates the step explanations and ingredient tips of a recipe in a
+background job so they land in ai_cache before anyone opens them; the next
+morning's cooking flow is then served from local data.
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+
+import db
+import jobs
+from recipe_loader import load_confirmed_recipe, load_recipe
+
+# Minutes between scheduled checks for tomorrow's confirmed meal
+PREWARM_INTERVAL_MINUTES = int(os.getenv('PREWARM_INTERVAL_MINUTES', 60))
+
+
+def prewarm_recipe(recipe_id):
+    """
+    Generate (or refresh from cache) all AI content of one recipe.
+
+    Returns:
+        Number of items warmed
+    """
+    from ai_assistant import get_ingredient_tips, get_step_explanation
+
+    recipe = load_recipe(db.get_connection(), recipe_id)
+    if not recipe:
+        return 0
+    # Don't hold a read snapshot open across the slow LLM calls
+    db.release_connection()
+
+    warmed = 0
+    for step in recipe['instructions']:
+        get_step_explanation(recipe['recipe_name'], step['step_number'], step['instruction'])
+        warmed += 1
+    for name in dict.fromkeys(i['ingredient_name'] for i in recipe['ingredients']):
+        get_ingredient_tips(name)
+        warmed += 1
+    return warmed
+
+
+def prewarm_in_background(recipe_id, start_workers=True):
+    """
+    Queue pre-warming of a recipe as a background job; no-op while one is
+    already queued or running. With start_workers=False the job is left for
+    the web workers' job threads (use this from the gunicorn master, which
+    must never make LLM calls: workers forked from it would inherit its
+    locks and in-flight state).
+    """
+    payload = {'recipe_id': recipe_id}
+    conn = db.get_connection()
+    try:
+        pending = conn.execute('''
+            SELECT 1 FROM jobs WHERE kind = 'prewarm' AND status IN ('queued', 'running') AND payload = ?
+        ''', (json.dumps(payload),)).fetchone()
+    finally:
+        db.release_connection()
+    if pending:
+        return False
+    jobs.enqueue('prewarm', payload, start_workers=start_workers)
+    return True
+
+
+def prewarm_tomorrow():
+    """
+    Scheduler job: queue pre-warming of tomorrow's confirmed meal, however it
+    was confirmed. Runs in the gunicorn master, so it only reads the database
+    and queues the job.
+    """
+    tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+    try:
+        recipe = load_confirmed_recipe(db.get_connection(), tomorrow)
+    finally:
+        db.release_connection()
+    if recipe:
+        prewarm_in_background(recipe['id'], start_workers=False)
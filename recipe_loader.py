@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Shared recipe loading layer.
+Fetches full recipes (recipe + nutrition + ingredients + instructions)
+in a single statement using SQLite JSON aggregation.
+"""
+
+import json
+
+RECIPE_COLUMNS = '''
+    r.*, n.calories, n.protein, n.carbohydrate, n.fat, n.fiber,
+    (
+        SELECT json_group_array(json_object(
+            'ingredient_name', i.ingredient_name,
+            'quantity', i.quantity,
+            'unit', i.unit,
+            'notes', i.notes
+        ))
+        FROM (
+            SELECT ingredient_name, quantity, unit, notes
+            FROM ingredients WHERE recipe_id = r.id
+            ORDER BY id
+        ) i
+    ) AS ingredients_json,
+    (
+        SELECT json_group_array(json_object(
+            'step_number', s.step_number,
+            'instruction', s.instruction
+        ))
+        FROM (
+            SELECT step_number, instruction
+            FROM instructions WHERE recipe_id = r.id
+            ORDER BY step_number
+        ) s
+    ) AS instructions_json
+'''
+
+
+def _row_to_recipe(row):
+    """Convert an aggregated row into a recipe dict."""
+    recipe = dict(row)
+    # Draw counts change without bumping the catalog generation, so they must
+    # stay out of payloads served under its ETags
+    recipe.pop('times_drawn', None)
+    recipe['ingredients'] = json.loads(recipe.pop('ingredients_json') or '[]')
+    recipe['instructions'] = json.loads(recipe.pop('instructions_json') or '[]')
+    return recipe
+
+
+def load_recipe(conn, recipe_id):
+    """Load one full recipe by id, or None if it does not exist."""
+    row = conn.execute(f'''
+        SELECT {RECIPE_COLUMNS}
+        FROM recipes r
+        LEFT JOIN nutrition n ON r.id = n.recipe_id
+        WHERE r.id = ?
+    ''', (recipe_id,)).fetchone()
+    return _row_to_recipe(row) if row else None
+
+
+def load_recipes(conn, recipe_ids):
+    """Load several full recipes in one statement, keeping the order of recipe_ids."""
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return []
+
+    placeholders = ', '.join('?' * len(recipe_ids))
+    rows = conn.execute(f'''
+        SELECT {RECIPE_COLUMNS}
+        FROM recipes r
+        LEFT JOIN nutrition n ON r.id = n.recipe_id
+        WHERE r.id IN ({placeholders})
+    ''', recipe_ids).fetchall()
+
+    by_id = {row['id']: _row_to_recipe(row) for row in rows}
+    return [by_id[recipe_id] for recipe_id in recipe_ids if recipe_id in by_id]
+
+
+def load_confirmed_recipe(conn, draw_date):
+    """Load the full recipe confirmed for draw_date, or None."""
+    row = conn.execute(f'''
+        SELECT {RECIPE_COLUMNS}, dh.id AS history_id
+        FROM draw_history dh
+        JOIN recipes r ON dh.recipe_id = r.id
+        LEFT JOIN nutrition n ON r.id = n.recipe_id
+        WHERE dh.draw_date = ? AND dh.confirmed = 1
+    ''', (draw_date,)).fetchone()
+    return _row_to_recipe(row) if row else None
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Semantic answer cache for cooking-help questions.
+Questions are embedded offline with hashed character n-grams (works for
+Chinese without a tokenizer or model download) and compared by cosine
+similarity against past questions about the same recipe, so "鸡蛋要煮多久"
+can reuse the answer given to "请问鸡蛋煮多久?". N-gram similarity cannot
+tell 盐 from 糖 or 可以 from 不可以, so a close match is only reused when
+the two questions differ in filler characters alone. Answers are stored in
+SQLite and each worker keeps a NumPy matrix per recipe, loading new rows
+written by other workers incrementally. Without NumPy the cache is disabled.
+"""
+
+import os
+import threading
+from collections import Counter
+import time
+import zlib
+
+import db
+from ai_cache import normalize, stats_buffer
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Cosine similarity at or above which a past answer is reused
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv('SEMANTIC_CACHE_THRESHOLD', 0.9))
+# Seconds an answer stays reusable
+SEMANTIC_CACHE_TTL_SECONDS = float(os.getenv('SEMANTIC_CACHE_TTL_SECONDS', 30 * 24 * 3600))
+# Most answers kept per recipe (oldest dropped first)
+SEMANTIC_CACHE_MAX_PER_RECIPE = int(os.getenv('SEMANTIC_CACHE_MAX_PER_RECIPE', 200))
+# Embedding size; changing it makes existing rows unusable until they expire
+EMBEDDING_DIM = 512
+NGRAM_SIZES = (1, 2)
+
+_PUNCTUATION = str.maketrans('', '', '?？!！。，,.、~～ ')
+# Particles and politeness that do not change what is asked; any other
+# character (negation, ingredient, quantity, method) makes it another question
+_FILLER = str.maketrans('', '', '的地得了吗呢啊吧呀嘛哦呗请问您你我想要')
+
+_lock = threading.Lock()
+_index = {}
+_index_pid = None
+_last_id = 0
+
+
+def _content(text):
+    """A question without case, punctuation and filler characters."""
+    return normalize(text).translate(_PUNCTUATION).translate(_FILLER)
+
+
+def same_content(question, other):
+    """True when two questions use the same content characters (in any order)."""
+    return Counter(_content(question)) == Counter(_content(other))
+
+
+def embed(text):
+    """L2-normalized hashed character n-gram vector for a question."""
+    text = _content(text)
+    vector = np.zeros(EMBEDDING_DIM, dtype=np.float32)
+    for n in NGRAM_SIZES:
+        for i in range(len(text) - n + 1):
+            h = zlib.crc32(text[i:i + n].encode('utf-8'))
+            # A signed hash keeps bucket collisions from adding up
+            vector[h % EMBEDDING_DIM] += 1 if h & 0x80000000 else -1
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class _RecipeIndex:
+    """Vectors, questions and answers for one recipe, as parallel arrays."""
+
+    def __init__(self):
+        self.vectors = np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+        self.created = np.zeros(0)
+        self.questions = []
+        self.answers = []
+
+    def add(self, rows):
+        vectors = [np.frombuffer(row['vector'], dtype=np.float32) for row in rows]
+        self.vectors = np.vstack([self.vectors] + [v[None, :] for v in vectors])
+        self.created = np.concatenate([self.created, [row['created_at'] for row in rows]])
+        self.questions.extend(row['question'] for row in rows)
+        self.answers.extend(row['answer'] for row in rows)
+
+        excess = len(self.answers) - SEMANTIC_CACHE_MAX_PER_RECIPE
+        if excess > 0:
+            self.vectors = self.vectors[excess:]
+            self.created = self.created[excess:]
+            self.questions = self.questions[excess:]
+            self.answers = self.answers[excess:]
+
+    def best(self, question, vector, now):
+        """Answer to the most similar live question with the same content, and its score."""
+        if not self.answers:
+            return None, 0.0
+        scores = self.vectors @ vector
+        scores[self.created <= now - SEMANTIC_CACHE_TTL_SECONDS] = -1
+        for i in np.argsort(-scores):
+            if scores[i] < SEMANTIC_CACHE_THRESHOLD:
+                break
+            if same_content(question, self.questions[i]):
+                return self.answers[i], float(scores[i])
+        return None, 0.0
+
+
+def _recipe_key(recipe_name):
+    return normalize(recipe_name or '')
+
+
+def _sync(conn):
+    """Load rows written since the last sync (by any worker) into this worker's index."""
+    global _index_pid, _last_id
+    if _index_pid != os.getpid():
+        _index.clear()
+        _index_pid = os.getpid()
+        _last_id = 0
+
+    rows = conn.execute('''
+        SELECT id, recipe_key, question, vector, answer, created_at FROM semantic_answers
+        WHERE id > ? AND length(vector) = ? ORDER BY id
+    ''', (_last_id, EMBEDDING_DIM * 4)).fetchall()
+    if not rows:
+        return
+
+    by_recipe = {}
+    for row in rows:
+        by_recipe.setdefault(row['recipe_key'], []).append(row)
+    for recipe_key, recipe_rows in by_recipe.items():
+        _index.setdefault(recipe_key, _RecipeIndex()).add(recipe_rows)
+    _last_id = rows[-1]['id']
+
+
+def lookup(recipe_name, question):
+    """Cached answer to a similar question about the same recipe, or None."""
+    if np is None:
+        return None
+
+    vector = embed(question)
+    with _lock:
+        _sync(db.get_connection())
+        index = _index.get(_recipe_key(recipe_name))
+        answer, _ = index.best(question, vector, time.time()) if index else (None, 0.0)
+
+    if answer is not None:
+        stats_buffer.add('semantic:hit')
+        return answer
+    stats_buffer.add('semantic:miss')
+    return None
+
+
+def store(recipe_name, question, answer):
+    """Remember an LLM answer for later similar questions."""
+    if np is None or not answer:
+        return
+
+    conn = db.get_connection()
+    now = time.time()
+    recipe_key = _recipe_key(recipe_name)
+    try:
+        conn.execute('''
+            INSERT INTO semantic_answers (recipe_key, question, vector, answer, created_at)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (recipe_key, question, embed(question).tobytes(), answer, now))
+        conn.execute('''
+            DELETE FROM semantic_answers WHERE recipe_key = ? AND id NOT IN (
+                SELECT id FROM semantic_answers WHERE recipe_key = ? ORDER BY id DESC LIMIT ?
+            )
+        ''', (recipe_key, recipe_key, SEMANTIC_CACHE_MAX_PER_RECIPE))
+        conn.execute('DELETE FROM semantic_answers WHERE created_at <= ?', (now - SEMANTIC_CACHE_TTL_SECONDS,))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"⚠️ Failed to store semantic cache entry: {e}")
@@ -14,10 +14,11 @@ load_dotenv()
 # Add the current directory to path
 sys.path.insert(0, os.path.dirname(__file__))
 
-from app import app
 from notifications import send_notifications
+import prewarm
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 import pytz
 
 def init_scheduler():
@@ -41,6 +42,17 @@ def init_scheduler():
             replace_existing=True
         )
         
+        # Catch meals confirmed through the planner (or while a warm-up failed).
+        # Only queues a job: the scheduler runs in the gunicorn master, which
+        # must stay free of LLM calls because workers are forked from it
+        scheduler.add_job(
+            prewarm.prewarm_tomorrow,
+            IntervalTrigger(minutes=prewarm.PREWARM_INTERVAL_MINUTES),
+            id='prewarm_tomorrow',
+            name="Pre-warm AI content for tomorrow's meal",
+            replace_existing=True
+        )
+        
         scheduler.start()
         print(f"📅 Scheduler started! Notifications at {notification_time} ({timezone})")
         
@@ -50,22 +62,98 @@ def init_scheduler():
 
 
 def init_database():
-    """Initialize database if it doesn't exist."""
-    db_path = os.path.join(os.path.dirname(__file__), 'breakfast.db')
+    """Bring the database up to date without touching existing ratings or history."""
+    from init_db import main as init_db_main
+    init_db_main()
+
+
+def gunicorn_options(port):
+    """
+    Gunicorn settings sized for this host.
+    The workload mixes short SQLite requests with long LLM waits, so a few
+    processes with many threads each (gthread) fit better than many
+    single-threaded processes: SQLite writes stay on few processes and
+    waiting LLM calls cost a thread, not a whole worker.
+    """
+    cpu_count = os.cpu_count() or 1
+    workers = int(os.getenv('WEB_CONCURRENCY', min(max(2, cpu_count), 4)))
+    threads = int(os.getenv('GUNICORN_THREADS', 8))
     
-    if not os.path.exists(db_path):
-        print("📦 Database not found. Initializing...")
-        from init_db import main as init_db_main
-        init_db_main()
+    return {
+        'bind': f'0.0.0.0:{port}',
+        'workers': workers,
+        'worker_class': os.getenv('GUNICORN_WORKER_CLASS', 'gthread'),
+        'threads': threads,
+        'timeout': int(os.getenv('GUNICORN_TIMEOUT', 120)),
+        'preload_app': os.getenv('GUNICORN_PRELOAD', '1') not in ('0', 'false'),
+        'accesslog': '-',
+        'errorlog': '-',
+        # Start the scheduler once, in the master, rather than in every worker
+        'when_ready': lambda arbiter: init_scheduler(),
+        'worker_exit': lambda arbiter, worker: flush_buffers(),
+        # Pick up queued jobs (including ones left by a restarted worker) right away
+        'post_worker_init': lambda worker: start_job_workers(),
+    }
+
+
+def warm_caches():
+    """
+    Load the catalog and draw sampler before workers fork, so every worker
+    starts with them already in (copy-on-write) memory.
+    """
+    import db
+    import draw_engine
+    
+    draw_engine.get_sampler(db.get_connection())
+    # Workers open their own connections; do not keep the master's across fork
+    db.close_connection()
+
+
+def start_job_workers():
+    """Start this worker's background job threads."""
+    import jobs
+    jobs.ensure_workers()
+
+
+def flush_buffers():
+    """Write buffered counters before a worker exits."""
+    import ai_cache
+    import counters
+    counters.times_drawn.flush()
+    ai_cache.stats_buffer.flush()
+
+
+def run_production(port):
+    """Run the app under gunicorn with auto-tuned workers."""
+    import gunicorn.app.base
+    
+    class StandaloneApplication(gunicorn.app.base.BaseApplication):
+        def __init__(self, options=None):
+            self.options = options or {}
+            super().__init__()
+
+        def load_config(self):
+            for key, value in self.options.items():
+                if key in self.cfg.settings and value is not None:
+                    self.cfg.set(key.lower(), value)
+
+        def load(self):
+            # Imported here, not at the top: with preload_app off the master
+            # never loads the app and each worker imports its own copy
+            from app import app
+            return app
+
+    options = gunicorn_options(port)
+    if options['preload_app']:
+        warm_caches()
+    print(f"🚀 gunicorn: {options['workers']} workers x {options['threads']} threads ({options['worker_class']})")
+    StandaloneApplication(options).run()
 
 
 if __name__ == '__main__':
     # Initialize database
     init_database()
     
-    # Start scheduler
-    init_scheduler()
-    
     # Get port from environment (for cloud deployment)
     port = int(os.getenv('PORT', 5000))
     
@@ -77,28 +165,11 @@ if __name__ == '__main__':
     is_production = os.getenv('PRODUCTION') or os.getenv('RAILWAY_ENVIRONMENT') or os.getenv('RENDER')
     
     if is_production:
-        # Production mode - use gunicorn
-        import gunicorn.app.base
-        
-        class StandaloneApplication(gunicorn.app.base.BaseApplication):
-            def __init__(self, app, options=None):
-                self.options = options or {}
-                self.application = app
-                super().__init__()
-
-            def load_config(self):
-                for key, value in self.options.items():
-                    if key in self.cfg.settings and value is not None:
-                        self.cfg.set(key.lower(), value)
-
-            def load(self):
-                return self.application
-
-        options = {
-            'bind': f'0.0.0.0:{port}',
-            'workers': 2,
-        }
-        StandaloneApplication(app, options).run()
+        # Production mode - gunicorn starts the scheduler in its master
+        run_production(port)
     else:
         # Development mode
+        from app import app
+        init_scheduler()
+        start_job_workers()
         app.run(debug=True, port=port, host='0.0.0.0')
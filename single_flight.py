@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Request coalescing for identical AI calls.
+Concurrent callers with the same key share one execution: within a
+worker, followers wait on the leader's in-flight call; across workers, a
+lease row in the ai_flights table elects one leader, which publishes its
+result there for the callers already waiting on it. Calls that arrive after
+the result is published run again instead of reusing it.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+
+import ai_runtime
+import db
+
+# Coordinate identical calls across worker processes through SQLite
+SINGLE_FLIGHT_CROSS_WORKER = os.getenv('SINGLE_FLIGHT_CROSS_WORKER', '1') == '1'
+# Seconds a leader's lease lasts; a crashed leader is replaced after this
+SINGLE_FLIGHT_LEASE_SECONDS = float(os.getenv('SINGLE_FLIGHT_LEASE_SECONDS', 120))
+# Seconds a published result stays available to followers that were waiting for it
+SINGLE_FLIGHT_RESULT_SECONDS = float(os.getenv('SINGLE_FLIGHT_RESULT_SECONDS', 30))
+# Seconds between lease checks while another worker runs the call
+SINGLE_FLIGHT_POLL_SECONDS = float(os.getenv('SINGLE_FLIGHT_POLL_SECONDS', 0.2))
+
+_lock = threading.Lock()
+_calls = {}
+_calls_pid = None
+
+
+class _Call:
+    """One in-flight execution that local followers wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+def _wait_timeout():
+    left = ai_runtime.remaining()
+    return ai_runtime.AI_CALL_TIMEOUT if left is None else max(0, left)
+
+
+def do(key, fn):
+    """
+    Run fn() once for all concurrent callers with the same key and return
+    its result to each of them (fn's exception is raised in each caller).
+    Results must be JSON-serializable when cross-worker coalescing is on.
+    """
+    global _calls_pid
+    with _lock:
+        if _calls_pid != os.getpid():
+            # Calls inherited across a fork have no leader in this process
+            _calls.clear()
+            _calls_pid = os.getpid()
+        call = _calls.get(key)
+        leader = call is None
+        if leader:
+            call = _calls[key] = _Call()
+
+    if not leader:
+        if not call.done.wait(_wait_timeout()):
+            raise TimeoutError('Timed out waiting for an identical AI call')
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    try:
+        call.result = _run_across_workers(key, fn) if SINGLE_FLIGHT_CROSS_WORKER else fn()
+        return call.result
+    except Exception as e:
+        call.error = e
+        raise
+    finally:
+        with _lock:
+            _calls.pop(key, None)
+        call.done.set()
+
+
+def _run_across_workers(key, fn):
+    """Lead the call for every worker, or wait for the worker that does."""
+    owner = f'{os.getpid()}:{uuid.uuid4().hex}'
+    give_up = time.monotonic() + _wait_timeout()
+    # Only a caller that saw the call in flight may take its result; a later
+    # identical call (e.g. a second "generate" of the same dish) runs anew
+    waited = False
+
+    while True:
+        state, value = _acquire(key, owner, waited)
+        if state == 'result':
+            return json.loads(value)
+        if state == 'lead':
+            break
+        waited = True
+        if time.monotonic() >= give_up:
+            # The other worker is too slow for our deadline; don't wait on it
+            return fn()
+        time.sleep(SINGLE_FLIGHT_POLL_SECONDS)
+
+    try:
+        result = fn()
+    except Exception:
+        _finish(key, owner, None)
+        raise
+    _finish(key, owner, result)
+    return result
+
+
+def _flight_state(conn, key, now, waited):
+    row = conn.execute(
+        'SELECT owner, lease_expires, result, result_expires FROM ai_flights WHERE key = ?',
+        (key,)
+    ).fetchone()
+    if waited and row and row['result'] is not None and row['result_expires'] > now:
+        return 'result', row['result']
+    if row and row['result'] is None and row['lease_expires'] > now:
+        return 'wait', None
+    return 'lead', None
+
+
+def _acquire(key, owner, waited):
+    """
+    Returns ('result', json) when the call we were waiting for has published
+    its result, ('wait', None) while another worker holds the lease, or
+    ('lead', None) once we hold it. Waiting only reads; the write lock is
+    taken just to claim a missing or expired lease.
+    """
+    conn = db.get_connection()
+    now = time.time()
+    state = _flight_state(conn, key, now, waited)
+    if state[0] != 'lead':
+        return state
+
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        # Someone may have claimed it between the read and the lock
+        state = _flight_state(conn, key, now, waited)
+        if state[0] != 'lead':
+            conn.rollback()
+            return state
+
+        conn.execute('''
+            INSERT OR REPLACE INTO ai_flights (key, owner, lease_expires, result, result_expires)
+            VALUES (?, ?, ?, NULL, NULL)
+        ''', (key, owner, now + SINGLE_FLIGHT_LEASE_SECONDS))
+        # Drop finished flights nobody will read any more
+        conn.execute('DELETE FROM ai_flights WHERE result_expires <= ? OR lease_expires <= ?', (now, now))
+        conn.commit()
+        return 'lead', None
+    except Exception:
+        conn.rollback()
+        raise
+
+
+def _finish(key, owner, result):
+    """Publish the leader's result, or release the lease after a failure."""
+    conn = db.get_connection()
+    try:
+        if result is None:
+            conn.execute('DELETE FROM ai_flights WHERE key = ? AND owner = ?', (key, owner))
+        else:
+            now = time.time()
+            conn.execute('''
+                UPDATE ai_flights SET result = ?, result_expires = ?, lease_expires = ?
+                WHERE key = ? AND owner = ?
+            ''', (json.dumps(result, ensure_ascii=False), now + SINGLE_FLIGHT_RESULT_SECONDS,
+                  now + SINGLE_FLIGHT_RESULT_SECONDS, key, owner))
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f"⚠️ Failed to publish AI call result: {e}")
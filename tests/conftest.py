@@ -0,0 +1,34 @@
+"""Shared fixtures: a freshly seeded database per test."""
+
+import threading
+
+import pytest
+
+import ai_cache
+import catalog
+import counters
+import db
+import draw_engine
+import init_db
+import semantic_cache
+
+
+@pytest.fixture
+def conn(tmp_path, monkeypatch):
+    """Connection to a temporary database built by init_db.main()."""
+    db_path = str(tmp_path / 'breakfast.db')
+    monkeypatch.setattr(db, 'DB_PATH', db_path)
+    monkeypatch.setattr(init_db, 'DB_PATH', db_path)
+    monkeypatch.setattr(db, '_local', threading.local())
+    # Per-worker caches must not leak between test databases
+    monkeypatch.setattr(catalog, '_snapshot', None)
+    monkeypatch.setattr(draw_engine, '_sampler', None)
+    monkeypatch.setattr(semantic_cache, '_index_pid', None)
+    init_db.main()
+
+    connection = db.connect()
+    yield connection
+    connection.close()
+    # Write-behind buffers must land in this database, not the real one at exit
+    counters.times_drawn.flush()
+    ai_cache.stats_buffer.flush()
@@ -0,0 +1,57 @@
+"""AI answer cache: entries expire after their TTL, the least recently used go first."""
+
+from types import SimpleNamespace
+
+import pytest
+
+import ai_cache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(ai_cache, 'time', SimpleNamespace(time=lambda: now[0]))
+    return now
+
+
+def test_entry_expires_after_its_ttl(conn, clock):
+    ai_cache.put('k', 'step', 'answer', ttl=60)
+    clock[0] += 59
+    assert ai_cache.get('k', 'step') == 'answer'
+
+    clock[0] += 1
+    assert ai_cache.get('k', 'step') is None
+
+
+def test_expired_entries_are_dropped_on_write(conn, clock):
+    ai_cache.put('old', 'step', 'answer', ttl=60)
+    clock[0] += 61
+    ai_cache.put('new', 'step', 'answer')
+
+    keys = [row['key'] for row in conn.execute('SELECT key FROM ai_cache')]
+    assert keys == ['new']
+
+
+def test_least_recently_used_entry_is_evicted(conn, clock, monkeypatch):
+    monkeypatch.setattr(ai_cache, 'AI_CACHE_MAX_ENTRIES', 2)
+    monkeypatch.setattr(ai_cache, 'AI_CACHE_TOUCH_SECONDS', 0)
+    ai_cache.put('a', 'step', 'A')
+    clock[0] += 1
+    ai_cache.put('b', 'step', 'B')
+    clock[0] += 1
+    # Reading a makes b the least recently used
+    assert ai_cache.get('a', 'step') == 'A'
+    clock[0] += 1
+
+    ai_cache.put('c', 'step', 'C')
+
+    assert [ai_cache.get(key, 'step') for key in 'abc'] == ['A', None, 'C']
+
+
+def test_recent_hits_skip_the_last_used_write(conn, clock):
+    ai_cache.put('k', 'step', 'answer')
+    clock[0] += ai_cache.AI_CACHE_TOUCH_SECONDS / 2
+    ai_cache.get('k', 'step')
+
+    last_used = conn.execute("SELECT last_used FROM ai_cache WHERE key = 'k'").fetchone()[0]
+    assert last_used == 1_000_000.0
@@ -0,0 +1,131 @@
+"""Provider routing: one trial call per half-open circuit, stream fallbacks and latency bookkeeping."""
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import ai_assistant
+import ai_router
+
+
+class BlockingStreamClient:
+    """Fake async client whose streamed answer starts once `release` is set."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **params):
+        while not self.release.is_set():
+            await asyncio.sleep(0.01)
+
+        async def chunks():
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content='答案'))])
+        return chunks()
+
+
+def test_stream_is_the_only_trial_of_a_half_open_provider(conn, monkeypatch):
+    client = BlockingStreamClient()
+    monkeypatch.setattr(ai_router, '_configured_clients', lambda: iter([('openai', client)]))
+    monkeypatch.setattr(ai_router, '_health', {})
+    health = ai_router._get_health('openai')
+    health.consecutive_failures = ai_router.AI_CIRCUIT_FAILURES
+    health.opened_at = time.monotonic() - ai_router.AI_CIRCUIT_COOLDOWN - 1
+    assert health.state() == 'half-open'
+
+    answer = []
+    stream = threading.Thread(target=lambda: answer.extend(
+        ai_assistant.stream_cooking_help('压测菜', [], '第一次压测的特别问题', [])))
+    stream.start()
+    time.sleep(0.2)
+
+    # While the trial stream is in flight, nobody else is routed to the provider
+    assert ai_router.candidates() == []
+
+    client.release.set()
+    stream.join(5)
+    assert answer == ['答案']
+    assert health.state() == 'closed'
+    assert [provider for _, provider, _ in ai_router.candidates()] == ['openai']
+
+
+class StreamClient:
+    """Fake async client streaming a fixed answer, or failing before the first chunk."""
+
+    def __init__(self, answer=None):
+        self.answer = answer
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    async def create(self, **params):
+        self.calls += 1
+        if self.answer is None:
+            raise RuntimeError('provider down')
+
+        async def chunks():
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=self.answer))])
+        return chunks()
+
+
+def half_open(provider):
+    health = ai_router._get_health(provider)
+    health.consecutive_failures = ai_router.AI_CIRCUIT_FAILURES
+    health.opened_at = time.monotonic() - ai_router.AI_CIRCUIT_COOLDOWN - 1
+    return health
+
+
+def test_only_one_request_gets_the_trial(monkeypatch):
+    monkeypatch.setattr(ai_router, '_health', {})
+    health = half_open('openai')
+
+    # Both requests were routed to the provider; only the first call goes out
+    assert ai_router.begin('openai') == 'trial'
+    assert ai_router.begin('openai') is None
+
+    # A call started before the circuit opened does not end the trial
+    ai_router.record('openai', 1.0, False, 'call')
+    assert health.trial_running
+
+    ai_router.record('openai', 1.0, True, 'trial')
+    assert health.state() == 'closed' and not health.trial_running
+    assert ai_router.begin('openai') == 'call'
+
+
+def test_routed_call_skips_a_provider_whose_trial_is_taken(monkeypatch):
+    monkeypatch.setattr(ai_router, '_health', {})
+    half_open('perplexity')
+    assert ai_router.begin('perplexity') == 'trial'
+
+    async def answer(**params):
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='openai'))])
+    busy = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=None)))
+    healthy = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=answer)))
+
+    route = [(busy, 'perplexity', 'sonar-pro'), (healthy, 'openai', 'gpt-4o-mini')]
+    assert ai_router.complete([], route=route) == 'openai'
+
+
+def test_stream_falls_back_to_the_next_provider(conn, monkeypatch):
+    primary, secondary = StreamClient(), StreamClient('第二家的答案')
+    monkeypatch.setattr(ai_router, '_configured_clients',
+                        lambda: iter([('perplexity', primary), ('openai', secondary)]))
+    monkeypatch.setattr(ai_router, '_health', {})
+
+    answer = list(ai_assistant.stream_cooking_help('压测菜', [], '换一家回答的特别问题', []))
+
+    assert answer == ['第二家的答案']
+    assert (primary.calls, secondary.calls) == (1, 1)
+    assert ai_router._get_health('perplexity').consecutive_failures == 1
+
+
+def test_stream_timings_stay_out_of_the_latency_window(conn, monkeypatch):
+    client = StreamClient('答案')
+    monkeypatch.setattr(ai_router, '_configured_clients', lambda: iter([('openai', client)]))
+    monkeypatch.setattr(ai_router, '_health', {})
+
+    assert list(ai_assistant.stream_cooking_help('压测菜', [], '不计入延迟的特别问题', [])) == ['答案']
+
+    health = ai_router._get_health('openai')
+    assert list(health.outcomes) == [True]
+    assert not health.latencies
@@ -0,0 +1,59 @@
+"""Bulk generation: one transaction, a savepoint per recipe, so a bad recipe skips only itself."""
+
+import ai_assistant
+import bulk_generate
+
+
+def recipe(name):
+    return {
+        'success': True,
+        'recipe_name': name,
+        'category': '粗粮谷物',
+        'ingredients': [{'name': '面粉', 'quantity': 100, 'unit': 'g'}],
+        'instructions': [{'step': 1, 'description': '和面'}],
+        'nutrition': {'calories': 300},
+    }
+
+
+def recipe_count(conn):
+    return conn.execute('SELECT COUNT(*) FROM recipes').fetchone()[0]
+
+
+def test_malformed_recipe_is_skipped_and_the_rest_commit(conn):
+    before = recipe_count(conn)
+    malformed = dict(recipe('坏食谱'), ingredients=['不是字典'])
+
+    results = ai_assistant.insert_recipes_to_db([recipe('葱油饼'), malformed, recipe('豆浆')])
+
+    assert [result['success'] for result in results] == [True, False, True]
+    assert recipe_count(conn) == before + 2
+    # Nothing of the malformed recipe is left behind, not even its recipes row
+    assert conn.execute("SELECT COUNT(*) FROM recipes WHERE recipe_name = '坏食谱'").fetchone()[0] == 0
+    ingredients = conn.execute('SELECT COUNT(*) FROM ingredients WHERE recipe_id IN (?, ?)',
+                               (results[0]['recipe_id'], results[2]['recipe_id'])).fetchone()[0]
+    assert ingredients == 2
+
+
+def test_generate_recipes_reports_each_dish(conn, monkeypatch):
+    def generate(dish_name):
+        if dish_name == '失败':
+            return {'success': False, 'error': 'provider down'}
+        if dish_name == '坏食谱':
+            return dict(recipe(dish_name), instructions=[None])
+        return recipe(dish_name)
+    monkeypatch.setattr(ai_assistant, 'generate_recipe_from_name', generate)
+
+    result = bulk_generate.generate_recipes(['葱油饼', '失败', ' 葱油饼 ', '坏食谱', '豆浆'], concurrency=2)
+
+    assert [(item['dish_name'], item['status']) for item in result['items']] == [
+        ('葱油饼', 'created'), ('失败', 'failed'), ('坏食谱', 'failed'), ('豆浆', 'created'),
+    ]
+    assert (result['success'], result['created'], result['failed']) == (True, 2, 2)
+    assert result['items'][1]['error'] == 'provider down'
+
+
+def test_generate_recipes_rejects_empty_and_oversized_batches(conn, monkeypatch):
+    monkeypatch.setattr(bulk_generate, 'BULK_GENERATE_MAX_DISHES', 2)
+
+    assert bulk_generate.generate_recipes(['', '  '])['success'] is False
+    assert bulk_generate.generate_recipes(['a', 'b', 'c'])['success'] is False
@@ -0,0 +1,39 @@
+"""The counter buffer stays within max_pending even while the database keeps failing."""
+
+from counters import CounterBuffer
+
+UPDATE_SQL = 'UPDATE recipes SET times_drawn = times_drawn + ? WHERE id = ?'
+
+
+def test_flush_writes_all_increments(conn):
+    buffer = CounterBuffer(UPDATE_SQL, flush_seconds=60, max_pending=100)
+    recipe_id = conn.execute('SELECT id FROM recipes LIMIT 1').fetchone()[0]
+    before = conn.execute('SELECT times_drawn FROM recipes WHERE id = ?', (recipe_id,)).fetchone()[0]
+
+    for _ in range(3):
+        buffer.add(recipe_id)
+    assert buffer.flush() == 1
+
+    after = conn.execute('SELECT times_drawn FROM recipes WHERE id = ?', (recipe_id,)).fetchone()[0]
+    assert after == before + 3
+    assert buffer.pending == 0
+
+
+def test_failing_flush_caps_pending_and_backs_off(conn, monkeypatch):
+    buffer = CounterBuffer('UPDATE no_such_table SET n = n + ? WHERE id = ?', flush_seconds=60, max_pending=5)
+    flushes = []
+    flush = buffer.flush
+    monkeypatch.setattr(buffer, 'flush', lambda: flushes.append(1) or flush())
+
+    for key in range(20):
+        buffer.add(key)
+
+    # One synchronous flush failed; later increments did not retry it
+    assert len(flushes) == 1
+    assert buffer.pending == 5
+    assert buffer.dropped == 15
+
+    # A background retry that fails again still keeps at most max_pending
+    buffer.flush()
+    assert buffer.pending == 5
+    assert buffer.dropped == 15
@@ -0,0 +1,87 @@
+"""Weighted draws follow rating_weight(r) / sum of weights, and sampling leaves weights intact."""
+
+import math
+import random
+from collections import Counter
+
+import pytest
+
+import draw_engine
+from draw_engine import WeightedSampler, rating_weight
+
+DRAWS = 100_000
+
+
+def assert_matches_weights(counts, weights, draws):
+    """Chi-square goodness of fit, plus a per-key tolerance of five standard deviations."""
+    total = sum(weights.values())
+    chi_square = 0.0
+    for key, weight in weights.items():
+        expected = draws * weight / total
+        chi_square += (counts.get(key, 0) - expected) ** 2 / expected
+        sigma = math.sqrt(expected * (1 - weight / total))
+        assert abs(counts.get(key, 0) - expected) <= 5 * sigma, key
+    # Far beyond the 99.9th percentile of chi-square with df degrees of freedom
+    df = len(weights) - 1
+    assert chi_square < df + 5 * math.sqrt(2 * df)
+    assert set(counts) <= set(weights)
+
+
+def make_sampler():
+    ratings = [1.0, 2.0, 2.5, 3.0, 3.5, 4.0, 4.5, 5.0, None, 3.0]
+    return WeightedSampler(range(len(ratings)), [rating_weight(r) for r in ratings])
+
+
+def test_sample_frequencies_match_weights():
+    sampler = make_sampler()
+    rng = random.Random(42)
+
+    counts = Counter(sampler.sample(rng) for _ in range(DRAWS))
+
+    assert_matches_weights(counts, {key: sampler.weight(key) for key in range(len(sampler))}, DRAWS)
+
+
+def test_sample_after_update_matches_new_weights():
+    sampler = make_sampler()
+    sampler.update(0, rating_weight(5.0))
+    sampler.update(7, rating_weight(1.0))
+    rng = random.Random(7)
+
+    counts = Counter(sampler.sample(rng) for _ in range(DRAWS))
+
+    assert_matches_weights(counts, {key: sampler.weight(key) for key in range(len(sampler))}, DRAWS)
+
+
+def test_draw_frequencies_match_ratings(conn):
+    ratings = {row['id']: row['user_rating'] for row in conn.execute('SELECT id, user_rating FROM recipes')}
+    rng = random.Random(1234)
+
+    counts = Counter(draw_engine.draw(conn, rng) for _ in range(DRAWS))
+
+    assert_matches_weights(counts, {key: rating_weight(r) for key, r in ratings.items()}, DRAWS)
+
+
+def test_update_keeps_total_consistent():
+    sampler = make_sampler()
+    weights = [sampler.weight(key) for key in range(len(sampler))]
+
+    sampler.update(3, 100.0)
+    assert sampler.total == pytest.approx(sum(weights) - weights[3] + 100.0)
+
+    sampler.update(3, weights[3])
+    assert sampler.total == pytest.approx(sum(weights))
+    assert [sampler.weight(key) for key in range(len(sampler))] == weights
+
+
+def test_sample_distinct_restores_weights():
+    sampler = make_sampler()
+    weights = [sampler.weight(key) for key in range(len(sampler))]
+    total = sampler.total
+    rng = random.Random(3)
+
+    for k in (1, 3, len(sampler), len(sampler) + 5):
+        chosen = sampler.sample_distinct(k, rng, exclude=(0, 1))
+        assert len(chosen) == len(set(chosen)) == min(k, len(sampler) - 2)
+        assert not {0, 1} & set(chosen)
+        assert [sampler.weight(key) for key in range(len(sampler))] == weights
+        assert sampler.total == pytest.approx(total)
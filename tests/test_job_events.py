@@ -0,0 +1,28 @@
+"""Job SSE streams hold a server thread each, so a worker serves only a few at once."""
+
+import ai_runtime
+import app as app_module
+import jobs
+
+
+def test_job_streams_are_limited_per_worker(conn, monkeypatch):
+    monkeypatch.setattr(jobs, 'ensure_workers', lambda: None)
+    monkeypatch.setattr(app_module, '_job_streams', ai_runtime.ForkSafeSlots(2))
+    job_id = jobs.enqueue('generate_recipe', {'dish_name': '葱油饼'}, start_workers=False)
+    client = app_module.app.test_client()
+    url = f'/api/jobs/{job_id}/events'
+
+    first = client.get(url, buffered=False)
+    second = client.get(url, buffered=False)
+    assert first.status_code == second.status_code == 200
+
+    refused = client.get(url, buffered=False)
+    assert refused.status_code == 503
+    assert refused.headers['Retry-After'] == '1'
+
+    # Closing a stream frees its slot
+    first.close()
+    third = client.get(url, buffered=False)
+    assert third.status_code == 200
+    second.close()
+    third.close()
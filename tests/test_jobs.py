@@ -0,0 +1,37 @@
+"""Job queue: idle polls stay off the write lock, a queued job is claimed once."""
+
+import db
+import jobs
+
+
+def traced_statements(conn):
+    statements = []
+    conn.set_trace_callback(statements.append)
+    return statements
+
+
+def test_idle_claim_only_reads(conn):
+    statements = traced_statements(db.get_connection())
+
+    assert jobs.claim('worker-a') is None
+    assert statements and all(s.lstrip().upper().startswith('SELECT') for s in statements)
+
+
+def test_queued_job_is_claimed_once(conn):
+    job_id = jobs.enqueue('generate_recipe', {'dish_name': '葱油饼'}, start_workers=False)
+
+    job = jobs.claim('worker-a')
+    assert job['id'] == job_id and job['kind'] == 'generate_recipe'
+    assert jobs.claim('worker-b') is None
+
+    claimed = jobs.get_job(job_id)
+    assert (claimed['status'], claimed['attempts']) == ('running', 1)
+
+
+def test_expired_lease_is_reclaimed(conn, monkeypatch):
+    job_id = jobs.enqueue('generate_recipe', {'dish_name': '葱油饼'}, start_workers=False)
+    monkeypatch.setattr(jobs, 'JOB_LEASE_SECONDS', -1)
+    jobs.claim('worker-a')
+
+    assert jobs.claim('worker-b')['id'] == job_id
+    assert jobs.get_job(job_id)['attempts'] == 2
@@ -0,0 +1,75 @@
+"""Offline knowledge base: keyword automaton, answer ranking and the first tier."""
+
+import ai_assistant
+import ai_router
+import semantic_cache
+from knowledge import AhoCorasick, KnowledgeBase
+
+
+def naive_matches(patterns, text):
+    return sorted(
+        (start, index)
+        for index, pattern in enumerate(patterns)
+        for start in range(len(text) - len(pattern) + 1)
+        if text.startswith(pattern, start)
+    )
+
+
+def test_automaton_finds_every_overlapping_match():
+    patterns = ['he', 'she', 'his', 'hers', '煮', '煮多久', '多久', '久']
+    automaton = AhoCorasick(patterns)
+
+    for text in ['ushers', 'hishershe', '鸡蛋煮多久煮多久', '', 'xyz']:
+        assert sorted(automaton.finditer(text)) == naive_matches(patterns, text)
+
+
+def kb():
+    return KnowledgeBase({
+        'default_answer': 'default',
+        'answers': [
+            {'id': 'time', 'keywords': ['多久', '煮多久', '时间'], 'answer': 'time'},
+            {'id': 'heat', 'keywords': ['火', '大火还是小火'], 'answer': 'heat'},
+            {'id': 'prep', 'recipe_independent': True, 'keywords': ['前一晚', '来不及'], 'answer': 'prep'},
+        ],
+        'ingredients': [{'name': '鸡蛋', 'aliases': ['土鸡蛋'], 'tips': 'egg tips'}],
+    })
+
+
+def test_longer_keywords_outrank_shorter_ones():
+    results = kb().search('煮多久用大火还是小火')
+
+    assert [answer for _, _, answer in results] == ['heat', 'time']
+    assert results[0][0] == len('火') + len('大火还是小火')
+
+
+def test_coverage_ignores_particles_and_punctuation():
+    [(_, coverage, answer)] = kb().search('煮多久呢？')
+    assert (coverage, answer) == (1.0, 'time')
+
+    [(_, coverage, _)] = kb().search('鸡蛋要煮多久')
+    assert coverage == 0.5
+
+
+def test_answer_falls_back_to_default():
+    assert kb().answer('怎么剥壳') == 'default'
+    assert kb().ingredient_tips(' 土鸡蛋 ') == 'egg tips'
+
+
+def test_first_tier_with_a_recipe_uses_only_recipe_independent_answers():
+    base = kb()
+
+    assert base.first_tier_answer('煮多久？') is None
+    assert base.first_tier_answer('煮多久？', has_recipe=False) == 'time'
+    assert base.first_tier_answer('来不及吗') == 'prep'
+    # Partly covered questions go to the LLM either way
+    assert base.first_tier_answer('鸡蛋要煮多久', has_recipe=False) is None
+
+
+def test_recipe_questions_reach_the_provider(monkeypatch):
+    monkeypatch.setattr(semantic_cache, 'lookup', lambda recipe_name, question: None)
+    monkeypatch.setattr(semantic_cache, 'store', lambda recipe_name, question, answer: None)
+    monkeypatch.setattr(ai_router, 'candidates', lambda: [(object(), 'openai', 'model')])
+    monkeypatch.setattr(ai_router, 'complete', lambda messages, route, **params: 'about 小米粥')
+
+    for question in ['煮多久？', '熟了吗', '时间', '没有']:
+        assert ai_assistant.get_cooking_help('小米粥', ['熬煮30分钟'], question) == 'about 小米粥'
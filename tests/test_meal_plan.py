@@ -0,0 +1,32 @@
+"""Confirming a plan never overwrites days another request confirmed first."""
+
+import meal_plan
+
+
+def test_confirm_plan_reports_days_taken_meanwhile(conn):
+    plan = meal_plan.build_plan(conn, '2030-01-01', 3, window=1)
+    assert [entry['already_confirmed'] for entry in plan] == [False, False, False]
+
+    # Another request confirms the second day after our plan was drawn
+    other = next(row['id'] for row in conn.execute('SELECT id FROM recipes')
+                 if row['id'] != plan[1]['recipe_id'])
+    conn.execute("INSERT INTO draw_history (recipe_id, draw_date, confirmed) VALUES (?, '2030-01-02', 1)", (other,))
+    conn.commit()
+
+    assert meal_plan.confirm_plan(conn, plan) == 2
+    assert plan[1] == {'draw_date': '2030-01-02', 'recipe_id': other, 'already_confirmed': True}
+
+    confirmed = dict(conn.execute('SELECT draw_date, recipe_id FROM draw_history WHERE confirmed = 1').fetchall())
+    assert confirmed == {entry['draw_date']: entry['recipe_id'] for entry in plan}
+
+
+def test_out_of_range_window_is_clamped(conn):
+    import app as app_module
+    client = app_module.app.test_client()
+
+    response = client.get('/api/plan?days=3&window=10000000')
+    assert response.status_code == 200
+    assert response.get_json()['window'] == app_module.MAX_PLAN_DAYS
+    assert len(response.get_json()['days']) == 3
+
+    assert client.get('/api/plan?days=3&window=-5').get_json()['window'] == 1
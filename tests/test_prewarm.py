@@ -0,0 +1,21 @@
+"""The scheduled warm-up only queues work: the gunicorn master never runs AI calls."""
+
+from datetime import datetime, timedelta
+
+import jobs
+import prewarm
+
+
+def test_prewarm_tomorrow_queues_one_job_without_starting_workers(conn, monkeypatch):
+    monkeypatch.setattr(jobs, '_workers_pid', None)
+    tomorrow = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+    recipe_id = conn.execute('SELECT id FROM recipes LIMIT 1').fetchone()[0]
+    conn.execute('INSERT INTO draw_history (recipe_id, draw_date, confirmed) VALUES (?, ?, 1)', (recipe_id, tomorrow))
+    conn.commit()
+
+    prewarm.prewarm_tomorrow()
+    prewarm.prewarm_tomorrow()
+
+    rows = conn.execute("SELECT payload, status FROM jobs WHERE kind = 'prewarm'").fetchall()
+    assert [tuple(row) for row in rows] == [(f'{{"recipe_id": {recipe_id}}}', 'queued')]
+    assert jobs._workers_pid is None
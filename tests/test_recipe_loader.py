@@ -0,0 +1,64 @@
+"""The recipe loaders fetch full recipes in a single statement (no N+1 queries)."""
+
+import pytest
+
+import catalog
+from recipe_loader import load_confirmed_recipe, load_recipe, load_recipes
+
+
+@pytest.fixture
+def statements(conn):
+    """Statements executed on conn, recorded from when the fixture is requested."""
+    executed = []
+    conn.set_trace_callback(executed.append)
+    yield executed
+    conn.set_trace_callback(None)
+
+
+def _recipe_ids(conn, limit):
+    return [row['id'] for row in conn.execute('SELECT id FROM recipes ORDER BY id LIMIT ?', (limit,))]
+
+
+def test_load_recipe_is_one_statement(conn, statements):
+    recipe_id = _recipe_ids(conn, 1)[0]
+    statements.clear()
+
+    recipe = load_recipe(conn, recipe_id)
+
+    assert len(statements) == 1
+    assert recipe['id'] == recipe_id
+    assert recipe['ingredients'] and recipe['instructions']
+
+
+def test_load_recipes_is_one_statement(conn, statements):
+    recipe_ids = _recipe_ids(conn, 5)[::-1]
+    statements.clear()
+
+    recipes = load_recipes(conn, recipe_ids)
+
+    assert len(statements) == 1
+    assert [recipe['id'] for recipe in recipes] == recipe_ids
+    assert all(recipe['ingredients'] and recipe['instructions'] for recipe in recipes)
+
+
+def test_load_confirmed_recipe_is_one_statement(conn, statements):
+    recipe_id = _recipe_ids(conn, 1)[0]
+    conn.execute(
+        'INSERT INTO draw_history (recipe_id, draw_date, confirmed) VALUES (?, ?, 1)',
+        (recipe_id, '2030-01-01')
+    )
+    conn.commit()
+    statements.clear()
+
+    recipe = load_confirmed_recipe(conn, '2030-01-01')
+
+    assert len(statements) == 1
+    assert recipe['id'] == recipe_id
+    assert recipe['ingredients'] and recipe['instructions']
+
+
+def test_payloads_leave_out_times_drawn(conn):
+    # Served under catalog-generation ETags, which draws do not bump
+    recipe_id = _recipe_ids(conn, 1)[0]
+    assert 'times_drawn' not in load_recipe(conn, recipe_id)
+    assert all('times_drawn' not in recipe for recipe in catalog.get_catalog(conn).recipes)
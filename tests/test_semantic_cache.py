@@ -0,0 +1,44 @@
+"""Semantic cache: rewordings reuse an answer, questions that differ in content do not."""
+
+import pytest
+
+import semantic_cache
+
+pytestmark = pytest.mark.skipif(semantic_cache.np is None, reason='needs numpy')
+
+
+@pytest.mark.parametrize('asked, cached', [
+    ('鸡蛋要煮多久', '鸡蛋煮多久?'),
+    ('请问鸡蛋要煮多久呢', '鸡蛋煮多久'),
+    ('需要放糖吗', '需要放糖吗？'),
+])
+def test_rewording_reuses_answer(conn, asked, cached):
+    semantic_cache.store('煮鸡蛋', cached, 'answer')
+
+    assert semantic_cache.lookup('煮鸡蛋', asked) == 'answer'
+
+
+@pytest.mark.parametrize('asked, cached', [
+    ('鸡蛋饼面糊要放多少盐', '鸡蛋饼面糊要放多少糖'),
+    ('煎鸡蛋的时候油温要多少度', '煎鸡蛋的时候水温要多少度'),
+    ('不需要放糖吗', '需要放糖吗'),
+    ('这个不可以提前一天做好吗', '这个可以提前一天做好吗'),
+    ('鸡蛋煮3分钟够吗', '鸡蛋煮5分钟够吗'),
+])
+def test_different_content_is_a_miss(conn, asked, cached):
+    semantic_cache.store('煮鸡蛋', cached, 'answer')
+
+    assert semantic_cache.lookup('煮鸡蛋', asked) is None
+
+
+def test_answers_are_per_recipe(conn):
+    semantic_cache.store('煮鸡蛋', '要煮多久', 'answer')
+
+    assert semantic_cache.lookup('小米粥', '要煮多久') is None
+
+
+def test_a_match_with_other_content_does_not_hide_a_later_one(conn):
+    semantic_cache.store('鸡蛋饼', '面糊要放多少糖', 'sugar')
+    semantic_cache.store('鸡蛋饼', '面糊放多少盐', 'salt')
+
+    assert semantic_cache.lookup('鸡蛋饼', '面糊要放多少盐') == 'salt'
@@ -0,0 +1,51 @@
+"""Cross-worker coalescing: followers wait without the write lock and only take results they waited for."""
+
+import threading
+import time
+
+import db
+import single_flight
+
+
+def _other_worker_leads(conn, key, publish_after):
+    """Simulate another worker holding the lease, then publishing 'shared'."""
+    now = time.time()
+    conn.execute(
+        "INSERT INTO ai_flights (key, owner, lease_expires) VALUES (?, 'other', ?)",
+        (key, now + single_flight.SINGLE_FLIGHT_LEASE_SECONDS)
+    )
+    conn.commit()
+
+    def publish():
+        time.sleep(publish_after)
+        single_flight._finish(key, 'other', 'shared')
+        db.release_connection()
+    thread = threading.Thread(target=publish)
+    thread.start()
+    return thread
+
+
+def test_follower_takes_result_without_write_lock(conn, monkeypatch):
+    monkeypatch.setattr(single_flight, 'SINGLE_FLIGHT_POLL_SECONDS', 0.05)
+    publisher = _other_worker_leads(conn, 'k', publish_after=0.3)
+    statements = []
+    db.get_connection().set_trace_callback(statements.append)
+
+    result = single_flight.do('k', lambda: 'own')
+
+    publisher.join()
+    db.get_connection().set_trace_callback(None)
+    assert result == 'shared'
+    assert len(statements) > 1
+    assert not [s for s in statements if s.startswith('BEGIN')]
+
+
+def test_published_result_is_not_reused_by_later_calls(conn):
+    calls = []
+
+    def generate():
+        calls.append(1)
+        return len(calls)
+
+    assert single_flight.do('generate:dish', generate) == 1
+    assert single_flight.do('generate:dish', generate) == 2
@@ -0,0 +1,26 @@
+"""Recipe photo uploads: bad input is a client error, provider failures keep their message."""
+
+from types import SimpleNamespace
+
+import ai_assistant
+import app as app_module
+
+
+def test_malformed_base64_upload_is_rejected(conn):
+    client = app_module.app.test_client()
+
+    response = client.post('/api/ai/upload-recipe', json={'image': 'data:image/jpeg;base64,abc'})
+
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_provider_error_is_reported_as_such(monkeypatch):
+    async def create(**params):
+        raise RuntimeError('provider down')
+    client = SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=create)))
+    monkeypatch.setattr(ai_assistant, 'get_async_openai_client', lambda: client)
+
+    result = ai_assistant.extract_recipe_from_image('aGVsbG8=')
+
+    assert result == {'success': False, 'error': '识别失败: provider down'}